@@ -0,0 +1,170 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+import sysconfig
+import tempfile
+
+import torch
+import triton
+import triton.language as tl
+
+import triton_tvm_ffi
+
+SHIM = """
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+
+extern "C" {
+
+void *__libc_malloc(size_t);
+void *__libc_calloc(size_t, size_t);
+void *__libc_realloc(void *, size_t);
+void *__libc_memalign(size_t, size_t);
+
+static std::atomic<uint64_t> allocations{0};
+
+void *malloc(size_t size) {
+  allocations.fetch_add(1, std::memory_order_relaxed);
+  return __libc_malloc(size);
+}
+
+void *calloc(size_t n, size_t size) {
+  allocations.fetch_add(1, std::memory_order_relaxed);
+  return __libc_calloc(n, size);
+}
+
+void *realloc(void *ptr, size_t size) {
+  allocations.fetch_add(1, std::memory_order_relaxed);
+  return __libc_realloc(ptr, size);
+}
+
+void *aligned_alloc(size_t align, size_t size) {
+  allocations.fetch_add(1, std::memory_order_relaxed);
+  return __libc_memalign(align, size);
+}
+
+int posix_memalign(void **ptr, size_t align, size_t size) {
+  allocations.fetch_add(1, std::memory_order_relaxed);
+  *ptr = __libc_memalign(align, size);
+  return *ptr == nullptr;
+}
+
+uint64_t triton_tvm_ffi_allocations() { return allocations.load(); }
+}
+"""
+
+CODE = """
+#include <tvm/ffi/container/tensor.h>
+#include <tvm/ffi/extra/c_env_api.h>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+#ifndef ADD_KERNEL_STUB
+#define ADD_KERNEL_STUB(grid, device, stream, args, kwargs)
+#endif
+
+#ifndef ALLOCATIONS_NAME
+#define ALLOCATIONS_NAME ""
+#endif
+
+extern "C" __attribute__((weak)) uint64_t triton_tvm_ffi_allocations();
+
+template <typename G>
+int64_t CountAllocations(
+    const G &grid, DLDevice device, void *stream,
+    const tvm::ffi::Array<tvm::ffi::Any> &args,
+    const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &kwargs,
+    int64_t rounds) {
+  ADD_KERNEL_STUB(grid, device.device_id, stream, args, kwargs);
+  uint64_t begin = triton_tvm_ffi_allocations ? triton_tvm_ffi_allocations() : 0;
+  for (int64_t i = 0; i < rounds; ++i) {
+    ADD_KERNEL_STUB(grid, device.device_id, stream, args, kwargs);
+  }
+  uint64_t end = triton_tvm_ffi_allocations ? triton_tvm_ffi_allocations() : 0;
+  return end - begin;
+}
+
+int64_t Allocations(tvm::ffi::Tensor x, tvm::ffi::Tensor y,
+                    tvm::ffi::Tensor output, int64_t rounds, bool lambda) {
+  int32_t numel = x.numel();
+  DLDevice device = x.device();
+  void *stream = TVMFFIEnvGetStream(device.device_type, device.device_id);
+  tvm::ffi::Array<tvm::ffi::Any> args = {x, y, output, numel, 1024};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {};
+  // tvm::ffi::Function grids are excluded: they receive the metadata as a
+  // freshly built Map on every call.
+  if (lambda) {
+    auto grid = [numel](const auto &meta) {
+      return (numel + meta["BLOCK_SIZE"] - 1) / meta["BLOCK_SIZE"];
+    };
+    return CountAllocations(grid, device, stream, args, kwargs, rounds);
+  }
+  tvm::ffi::Tuple<int32_t, int32_t, int32_t> grid((numel + 1023) / 1024, 1, 1);
+  return CountAllocations(grid, device, stream, args, kwargs, rounds);
+}
+
+TVM_FFI_STATIC_INIT_BLOCK() {
+  namespace refl = tvm::ffi::reflection;
+  refl::GlobalDef().def(ALLOCATIONS_NAME, Allocations);
+}
+"""
+
+
+@triton_tvm_ffi.jit
+@triton.jit
+def add_kernel(x_ptr, y_ptr, output_ptr, n_elements, BLOCK_SIZE: tl.constexpr):
+    pid = tl.program_id(axis=0)
+    block_start = pid * BLOCK_SIZE
+    offsets = block_start + tl.arange(0, BLOCK_SIZE)
+    mask = offsets < n_elements
+    x = tl.load(x_ptr + offsets, mask=mask)
+    y = tl.load(y_ptr + offsets, mask=mask)
+    output = x + y
+    tl.store(output_ptr + offsets, output, mask=mask)
+
+
+@triton_tvm_ffi.wrap(
+    [add_kernel],
+    CODE,
+    extra_include_paths=[
+        f"{Path(__file__).parents[1] / 'include'}",
+        f"{sysconfig.get_path('purelib')}/triton/backends/nvidia/include",
+    ],
+    extra_ldflags=["-lcuda"],
+)
+def allocations(
+    x: torch.Tensor, y: torch.Tensor, output: torch.Tensor, rounds: int, lambda_: bool
+) -> int: ...
+
+
+if __name__ == "__main__":
+    if "TRITON_TVM_FFI_ALLOCATIONS" not in os.environ:
+        shim: Path = Path(tempfile.mkdtemp()) / "allocations.so"
+        subprocess.run(
+            ["c++", "-x", "c++", "-shared", "-fPIC", "-O2", "-", "-o", f"{shim}"],
+            input=SHIM.encode("utf-8"),
+            check=True,
+        )
+        os.execve(
+            sys.executable,
+            [sys.executable, __file__],
+            {
+                **os.environ,
+                "LD_PRELOAD": f"{shim}",
+                "TRITON_TVM_FFI_ALLOCATIONS": "1",
+            },
+        )
+
+    x: torch.Tensor = torch.rand(98432, device="cuda")
+    y: torch.Tensor = torch.rand(98432, device="cuda")
+    round = 100000
+    for grid, lambda_ in (("tuple", False), ("lambda", True)):
+        output: torch.Tensor = torch.empty_like(x)
+        allocations(x, y, output, 0, lambda_)
+        count: int = allocations(x, y, output, round, lambda_)
+        torch.cuda.synchronize()
+        torch.testing.assert_close(output, x + y)
+        print(f"heap allocations ({grid} grid): {count} in {round} launches")
+        assert count == 0
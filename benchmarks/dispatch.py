@@ -0,0 +1,49 @@
+from pathlib import Path
+import sysconfig
+import time
+
+import triton_tvm_ffi
+
+CODE = """
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+#ifndef NOOP_NAME
+#define NOOP_NAME ""
+#endif
+
+int64_t Noop(int64_t x) { return x; }
+
+TVM_FFI_STATIC_INIT_BLOCK() {
+  namespace refl = tvm::ffi::reflection;
+  refl::GlobalDef().def(NOOP_NAME, Noop);
+}
+"""
+
+
+@triton_tvm_ffi.wrap(
+    [],
+    CODE,
+    extra_include_paths=[
+        f"{Path(__file__).parents[1] / 'include'}",
+        f"{sysconfig.get_path('purelib')}/triton/backends/nvidia/include",
+    ],
+)
+def noop(x: int) -> int: ...
+
+
+if __name__ == "__main__":
+    func = noop.compile()
+    assert noop(1) == func(1) == 1
+
+    round = 100000
+    cp0 = time.perf_counter_ns()
+    for _ in range(round):
+        func(1)
+    cp1 = time.perf_counter_ns()
+    for _ in range(round):
+        noop(1)
+    cp2 = time.perf_counter_ns()
+    print(
+        f"tvm_ffi.Function: {(cp1 - cp0) / round:.1f} ns\nTVMFFIWrapperFunction: {(cp2 - cp1) / round:.1f} ns"
+    )
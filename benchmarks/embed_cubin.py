@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+import subprocess
+import tempfile
+import time
+from typing import Tuple
+
+from tvm_ffi.utils.embed_cubin import embed_cubin
+
+SIZES = [64 << 10, 256 << 10, 1 << 20]
+
+
+def compile_source(source: str, workdir: Path) -> Path:
+    src: Path = workdir / "main.cc"
+    obj: Path = workdir / "main.o"
+    src.write_text(source)
+    subprocess.run(
+        ["c++", "-std=c++17", "-O2", "-fPIC", "-c", str(src), "-o", str(obj)],
+        check=True,
+    )
+    return obj
+
+
+def hex_literal(cubin: bytes, workdir: Path) -> Tuple[float, float]:
+    cp0 = time.perf_counter_ns()
+    cstr: str = "".join(f"\\x{byte:02x}" for byte in cubin)
+    source: str = f'static constexpr char __cubin[] = "{cstr}";\nconst char *get() {{ return __cubin; }}\n'
+    cp1 = time.perf_counter_ns()
+    compile_source(source, workdir)
+    cp2 = time.perf_counter_ns()
+    return (cp1 - cp0) * 1e-6, (cp2 - cp1) * 1e-6
+
+
+def embedded(cubin: bytes, workdir: Path) -> Tuple[float, float]:
+    cp0 = time.perf_counter_ns()
+    source: str = 'extern "C" const char __tvm_ffi__cubin_bench[];\nconst char *get() { return __tvm_ffi__cubin_bench; }\n'
+    cp1 = time.perf_counter_ns()
+    obj: Path = compile_source(source, workdir)
+    (workdir / "bench.cubin").write_bytes(cubin)
+    embed_cubin(workdir / "bench.cubin", obj, workdir / "embedded.o", "bench")
+    cp2 = time.perf_counter_ns()
+    return (cp1 - cp0) * 1e-6, (cp2 - cp1) * 1e-6
+
+
+if __name__ == "__main__":
+    for size in SIZES:
+        cubin: bytes = os.urandom(size)
+        with tempfile.TemporaryDirectory() as workdir:
+            hex_render, hex_compile = hex_literal(cubin, Path(workdir))
+        with tempfile.TemporaryDirectory() as workdir:
+            embed_render, embed_compile = embedded(cubin, Path(workdir))
+        print(
+            f"{size >> 10} KiB cubin\n"
+            f"  hex literal: render {hex_render:.3f} ms, compile {hex_compile:.3f} ms, source {size * 4 >> 10} KiB\n"
+            f"  embedded:    render {embed_render:.3f} ms, compile {embed_compile:.3f} ms"
+        )
@@ -0,0 +1,363 @@
+import ctypes
+from pathlib import Path
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import torch
+import triton
+import triton.language as tl
+from triton.runtime import driver
+import tvm_ffi
+
+import triton_tvm_ffi
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.kernel import TVMFFIKernel
+from triton_tvm_ffi.utils import type_canonicalize
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from standin import StandinDriver, compile_driver, wrapper_flags
+
+LAYERS = """
+#include <chrono>
+#include <cstdint>
+#include <string_view>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+template <typename F> inline double __Measure(int64_t rounds, F &&f) {{
+  volatile int64_t sink = 0;
+  auto begin = std::chrono::steady_clock::now();
+  for (int64_t i = 0; i < rounds; ++i) {{
+    sink = sink + static_cast<int64_t>(f());
+  }}
+  return std::chrono::duration<double, std::nano>(
+             std::chrono::steady_clock::now() - begin)
+             .count() /
+         rounds;
+}}
+
+tvm::ffi::Map<tvm::ffi::String, double>
+__Layers(const tvm::ffi::Array<tvm::ffi::Any> &args,
+         const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &kwargs,
+         tvm::ffi::String key, int64_t rounds) {{
+  triton_tvm_ffi::PackedArgs<{varnames}> source{{args, kwargs}};
+  __meta_{fnname}_0<decltype(source)> meta{{source}};
+  std::string_view name(key.data(), key.size());
+  auto grid = [name](const auto &meta) -> triton_tvm_ffi::GridDim {{
+    return {{static_cast<int32_t>(65536 / meta[name]), 1, 1}};
+  }};
+  return {{
+      {{"fill_meta", __Measure(rounds, [&]() {{
+          tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> filled;
+          source.Fill(filled);
+          return filled.size();
+        }})}},
+      {{"grid", __Measure(rounds, [&]() {{
+          return triton_tvm_ffi::MakeGridDim(grid, meta)[0];
+        }})}},
+      {{"casts", __Measure(rounds, [&]() {{
+          int64_t sum = 0;
+{casts}
+          return sum;
+        }})}},
+      {{"get_kernel", __Measure(rounds, [&]() {{
+          return triton_tvm_ffi::GetKernel<__fnname_{fnname}, __tvm_ffi__cubin_triton_{fnname}_0, {shmem}>(0) != nullptr;
+        }})}},
+  }};
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  namespace refl = tvm::ffi::reflection;
+  refl::GlobalDef().def({name}_NAME ".layers", __Layers);
+}}
+"""
+
+EXAMPLES: Path = Path(__file__).parents[1] / "examples"
+
+
+@triton_tvm_ffi.jit
+@triton.jit
+def add_kernel(x_ptr, y_ptr, output_ptr, n_elements, BLOCK_SIZE: tl.constexpr):
+    pass
+
+
+@triton_tvm_ffi.jit
+@triton.jit
+def softmax_kernel(
+    output_ptr,
+    input_ptr,
+    input_row_stride,
+    output_row_stride,
+    n_rows,
+    n_cols,
+    BLOCK_SIZE: tl.constexpr,
+):
+    pass
+
+
+@triton_tvm_ffi.jit
+@triton.autotune(
+    configs=[
+        triton.Config(
+            {
+                "BLOCK_SIZE_M": 128,
+                "BLOCK_SIZE_N": 128,
+                "BLOCK_SIZE_K": 32,
+                "GROUP_SIZE_M": 8,
+            },
+            num_stages=4,
+            num_warps=4,
+        ),
+    ],
+    key=["M", "N", "K"],
+)
+@triton.jit
+def matmul_kernel(
+    a_ptr,
+    b_ptr,
+    c_ptr,
+    M,
+    N,
+    K,
+    stride_am,
+    stride_ak,
+    stride_bk,
+    stride_bn,
+    stride_cm,
+    stride_cn,
+    BLOCK_SIZE_M: tl.constexpr,
+    BLOCK_SIZE_N: tl.constexpr,
+    BLOCK_SIZE_K: tl.constexpr,
+    GROUP_SIZE_M: tl.constexpr,
+    ACTIVATION: tl.constexpr,
+):
+    pass
+
+
+@triton_tvm_ffi.jit
+@triton.autotune(
+    configs=[
+        triton.Config({"BLOCK_M": 128, "BLOCK_N": 64}, num_stages=2, num_warps=4)
+    ],
+    key=["N_CTX", "HEAD_DIM"],
+)
+@triton.jit
+def _attn_fwd(
+    sm_scale,
+    M,
+    Z,
+    H,
+    desc_q,
+    desc_k,
+    desc_v,
+    desc_o,
+    N_CTX,
+    HEAD_DIM: tl.constexpr,
+    BLOCK_M: tl.constexpr,
+    BLOCK_N: tl.constexpr,
+    STAGE: tl.constexpr,
+):
+    pass
+
+
+def specialize(
+    fn: TVMFFIJITFunction,
+    types: Sequence[str],
+    constants: Dict[str, Any],
+    tuning: Optional[Dict[str, Any]] = None,
+) -> TVMFFIKernel:
+    best_config: Optional[Dict[str, Any]] = (
+        fn.fn.configs[0].all_kwargs() if tuning is not None else None
+    )
+    spec: TVMFFIKernel = TVMFFIKernel(
+        f"{fn.fnname}_standin",
+        b"STANDIN\0",
+        [type_canonicalize(ty) for ty in types],
+        4,
+        0,
+        best_config,
+        TVMFFIKernel.make_guards(
+            fn.params,
+            types,
+            {(fn.signature.index(k),): v for k, v in constants.items()},
+            {},
+            best_config or {},
+        ),
+        constants,
+    )
+    fn.kernels[spec.hash] = spec
+    if tuning is not None:
+        fn.tunings[spec.hash] = {"config": best_config, **tuning}
+    fn.restored.add(driver.active.get_current_target())
+    return spec
+
+
+def build(
+    name: str,
+    fn: TVMFFIJITFunction,
+    example: Path,
+    standin: ctypes.CDLL,
+) -> TVMFFIWrapperFunction:
+    spec: TVMFFIKernel = fn.specializations[0]
+    casts: List[str] = [
+        f"          sum += reinterpret_cast<intptr_t>(triton_tvm_ffi::DataPtr(triton_tvm_ffi::GetArg<__varname_{fn.fnname}_{i}>(args, kwargs, {i})));"
+        if ctype == "CUdeviceptr"
+        else f"          sum += static_cast<int64_t>(triton_tvm_ffi::Cast<{ctype}>(triton_tvm_ffi::GetArg<__varname_{fn.fnname}_{i}>(args, kwargs, {i})));"
+        for i, ctype in enumerate(spec.ctypes)
+        if ctype is not None
+    ]
+    return triton_tvm_ffi.wrap(
+        [fn],
+        example.read_text()
+        + LAYERS.format(
+            name=name.upper(),
+            fnname=fn.fnname,
+            varnames=", ".join(
+                f"__varname_{fn.fnname}_{i}" for i in range(len(fn.signature))
+            ),
+            casts="\n".join(casts),
+            shmem=spec.shmem,
+        ),
+        **wrapper_flags(standin),
+    )(name)
+
+
+def measure(round: int, f: Callable[[], Any]) -> float:
+    f()
+    cp0 = time.perf_counter_ns()
+    for _ in range(round):
+        f()
+    cp1 = time.perf_counter_ns()
+    return (cp1 - cp0) / round
+
+
+if __name__ == "__main__":
+    standin: ctypes.CDLL = compile_driver()
+    driver.set_active(StandinDriver())
+
+    specialize(
+        add_kernel,
+        ["*fp32", "*fp32", "*fp32", "i32", "constexpr"],
+        {"BLOCK_SIZE": 1024},
+    )
+    specialize(
+        softmax_kernel,
+        ["*fp32", "*fp32", "i32", "i32", "i32", "i32", "constexpr"],
+        {"BLOCK_SIZE": 1024},
+    )
+    specialize(
+        matmul_kernel,
+        ["*fp16"] * 3 + ["i32"] * 9 + ["constexpr"] * 5,
+        {"ACTIVATION": ""},
+        {
+            "dtypes": {k: "torch.float16" for k in ("a_ptr", "b_ptr", "c_ptr")},
+            "key": {"M": 512, "N": 512, "K": 512},
+        },
+    )
+    specialize(
+        _attn_fwd,
+        ["fp32", "*fp32", "i32", "i32", *["*fp16"] * 4, "i32", *["constexpr"] * 4],
+        {"HEAD_DIM": 64, "STAGE": 3},
+        {
+            "dtypes": {
+                "M": "torch.float32",
+                **{
+                    k: "torch.float16"
+                    for k in ("desc_q", "desc_k", "desc_v", "desc_o")
+                },
+            },
+            "key": {"N_CTX": 128, "HEAD_DIM": 64},
+        },
+    )
+
+    x: torch.Tensor = torch.rand(98432)
+    y: torch.Tensor = torch.rand(98432)
+    s: torch.Tensor = torch.randn(1823, 781)
+    a: torch.Tensor = torch.rand(512, 512, dtype=torch.float16)
+    b: torch.Tensor = torch.rand(512, 512, dtype=torch.float16)
+    q: torch.Tensor = torch.rand(1, 2, 128, 64, dtype=torch.float16)
+    benchmarks: List[
+        Tuple[
+            str,
+            str,
+            TVMFFIJITFunction,
+            Path,
+            Tuple[Any, ...],
+            List[Any],
+            Dict[str, Any],
+            str,
+        ]
+    ] = [
+        (
+            "add",
+            "add",
+            add_kernel,
+            EXAMPLES / "add" / "add.cc",
+            (x, y),
+            [x, y, torch.empty_like(x), x.numel(), 1024],
+            {},
+            "BLOCK_SIZE",
+        ),
+        (
+            "softmax",
+            "softmax",
+            softmax_kernel,
+            EXAMPLES / "softmax" / "softmax.cc",
+            (s,),
+            [torch.empty_like(s), s, s.stride(0), s.stride(0), 1823, 781, 1024],
+            {},
+            "BLOCK_SIZE",
+        ),
+        (
+            "mm",
+            "matmul",
+            matmul_kernel,
+            EXAMPLES / "mm" / "mm.cc",
+            (a, b, ""),
+            [a, b, torch.empty_like(a), 512, 512, 512, 512, 1, 512, 1, 512, 1],
+            {"ACTIVATION": ""},
+            "BLOCK_SIZE_M",
+        ),
+        (
+            "attention",
+            "_attn_fwd_tvm_ffi",
+            _attn_fwd,
+            EXAMPLES / "attention" / "attnfwd.cc",
+            (q, q, q, True, 0.5),
+            [0.5, torch.empty(1, 2, 128), 1, 2, q, q, q, torch.empty_like(q), 128],
+            {"HEAD_DIM": 64, "STAGE": 3},
+            "BLOCK_M",
+        ),
+    ]
+
+    round = 10000
+    for label, name, fn, example, args, layer_args, layer_kwargs, key in benchmarks:
+        wrapper: TVMFFIWrapperFunction = build(name, fn, example, standin)
+        func: tvm_ffi.Function = wrapper.compile()
+        launches: int = standin.triton_tvm_ffi_launches()
+        python: float = measure(round, lambda: wrapper(*args))
+        ffi: float = measure(round, lambda: func(*args))
+        if standin.triton_tvm_ffi_launches() - launches != 2 * (round + 1):
+            raise RuntimeError(f"{label} did not stay on the native launch path")
+        wrapper.enable_telemetry()
+        wrapper.reset_telemetry()
+        measure(round, lambda: func(*args))
+        stats: Dict[str, Any] = wrapper.telemetry()[fn.fnname]["specializations"][
+            0
+        ]
+        wrapper.enable_telemetry(False)
+        layers: Dict[str, float] = dict(
+            tvm_ffi.get_global_func(f"{wrapper.uniquename}.layers")(
+                layer_args, layer_kwargs, key, round
+            ).items()
+        )
+        print(
+            f"{label}\n"
+            f"  TVMFFIWrapperFunction.__call__: {python:.1f} ns/launch\n"
+            f"  tvm_ffi.Function:               {ffi:.1f} ns/launch\n"
+            f"  native launcher:                {stats['host_ns'] / stats['launches']:.1f} ns/launch\n"
+            f"  FillMeta:                       {layers['fill_meta']:.1f} ns/launch\n"
+            f"  MakeGridDim:                    {layers['grid']:.1f} ns/launch\n"
+            f"  argument casts:                 {layers['casts']:.1f} ns/launch\n"
+            f"  GetKernel:                      {layers['get_kernel']:.1f} ns/launch"
+        )
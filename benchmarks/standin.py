@@ -0,0 +1,231 @@
+import ctypes
+from pathlib import Path
+import subprocess
+import sysconfig
+import tempfile
+from typing import Any, Dict, List
+
+import torch.utils.cpp_extension
+from triton.backends.compiler import GPUTarget
+
+from triton_tvm_ffi.utils import stable_hash
+
+DRIVER = """
+#include <stdint.h>
+#include <string.h>
+
+typedef int CUresult;
+
+typedef struct {
+  void *func;
+  unsigned grid[3];
+  unsigned block[3];
+  unsigned smem;
+  void **params;
+  void **extra;
+  void *kern;
+  void *ctx;
+} CUDA_KERNEL_NODE_PARAMS;
+
+static uint64_t launches = 0;
+static int devices = 1;
+static char contexts[64];
+static __thread int stack[16];
+static __thread int depth = 0;
+static __thread int base = -1;
+static int load_device = -1;
+static uint64_t device_loads[64];
+static uint64_t loads = 0;
+static uint64_t unloads = 0;
+static uint64_t allocs = 0;
+static uint64_t frees = 0;
+static char function = 0;
+static uint64_t memory = 0x10000;
+static char images[1024][64];
+static char launched[64];
+static uint64_t grid = 0;
+static uint64_t tensormap_types = 0;
+static uint64_t tensormap_fills = 0;
+static int capturing = 0;
+static uint64_t nodes = 0;
+static char node_slots[1024];
+static uint64_t graphs[1024];
+static uint64_t graph_count = 0;
+static uint64_t captures = 0;
+static uint64_t replays = 0;
+static uint64_t patches = 0;
+static char patched[64];
+static uint64_t patched_arg = 0;
+
+CUresult cuInit(unsigned flags) { return 0; }
+CUresult cuGetErrorName(CUresult code, const char **str) { *str = "CUDA_ERROR_STANDIN"; return 0; }
+CUresult cuGetErrorString(CUresult code, const char **str) { *str = "stand-in driver"; return 0; }
+CUresult cuDriverGetVersion(int *version) { *version = 12080; return 0; }
+CUresult cuDeviceGet(int *device, int ordinal) { *device = ordinal; return 0; }
+CUresult cuDeviceGetCount(int *count) { *count = devices; return 0; }
+CUresult cuDeviceGetAttribute(int *value, int attr, int device) { *value = 232448; return 0; }
+CUresult cuDevicePrimaryCtxRetain(void **ctx, int device) { *ctx = &contexts[device]; return 0; }
+CUresult cuDevicePrimaryCtxRelease_v2(int device) { return 0; }
+CUresult cuCtxPushCurrent_v2(void *ctx) { stack[depth++] = (char *)ctx - contexts; return 0; }
+CUresult cuCtxPopCurrent_v2(void **ctx) {
+  --depth;
+  if (ctx) *ctx = &contexts[stack[depth]];
+  return 0;
+}
+CUresult cuModuleLoadData(void **module, const void *image) {
+  int device = depth > 0 ? stack[depth - 1] : base;
+  char *slot = images[__atomic_fetch_add(&loads, 1, __ATOMIC_SEQ_CST) % 1024];
+  load_device = device;
+  if (device >= 0) __atomic_fetch_add(&device_loads[device], 1, __ATOMIC_SEQ_CST);
+  strncpy(slot, (const char *)image, 63);
+  *module = slot;
+  return 0;
+}
+CUresult cuModuleUnload(void *module) { ++unloads; return 0; }
+CUresult cuModuleGetFunction(void **func, void *module, const char *name) { *func = module; return 0; }
+CUresult cuFuncGetAttribute(int *value, int attr, void *func) { *value = 0; return 0; }
+CUresult cuFuncSetAttribute(void *func, int attr, int value) { return 0; }
+CUresult cuMemAlloc_v2(uint64_t *ptr, size_t size) { ++allocs; *ptr = memory; memory += (size + 255) / 256 * 256; return 0; }
+CUresult cuMemFree_v2(uint64_t ptr) { ++frees; return 0; }
+static CUresult launch(void *func, const unsigned *dims) {
+  if (capturing) {
+    ++nodes;
+  } else {
+    ++launches;
+    strncpy(launched, (const char *)func, 63);
+    grid = (uint64_t)dims[0] | (uint64_t)dims[1] << 20 | (uint64_t)dims[2] << 40;
+  }
+  return 0;
+}
+CUresult cuLaunchKernel(void *func, unsigned gx, unsigned gy, unsigned gz, unsigned bx, unsigned by, unsigned bz, unsigned smem, void *stream, void **params, void **extra) {
+  unsigned dims[3] = {gx, gy, gz};
+  return launch(func, dims);
+}
+CUresult cuLaunchKernelEx(const void *config, void *func, void **params, void **extra) { return launch(func, (const unsigned *)config); }
+CUresult cuTensorMapEncodeTiled(void *map, int type, unsigned rank, void *addr, const uint64_t *shape, const uint64_t *strides, const unsigned *box, const unsigned *elem, int interleave, int swizzle, int l2, int oob) { memset(map, 0, 128); tensormap_types |= 1ull << type; tensormap_fills |= 1ull << oob; return 0; }
+CUresult cuStreamIsCapturing(void *stream, int *status) { *status = capturing; return 0; }
+CUresult cuStreamGetCaptureInfo_v3(void *stream, int *status, uint64_t *id, void **graph, const void **deps, const void **edges, size_t *count) {
+  static void *node;
+  node = &node_slots[(nodes + 1023) % 1024];
+  *status = capturing;
+  *deps = &node;
+  *count = capturing && nodes > 0;
+  return 0;
+}
+CUresult cuStreamBeginCapture_v2(void *stream, int mode) { capturing = 1; nodes = 0; return 0; }
+CUresult cuStreamEndCapture(void *stream, void **graph) {
+  uint64_t *slot = &graphs[graph_count++ % 1024];
+  *slot = nodes;
+  *graph = slot;
+  capturing = 0;
+  ++captures;
+  return 0;
+}
+CUresult cuGraphGetNodes(void *graph, void **nodes_out, size_t *count) { *count = *(uint64_t *)graph; return 0; }
+CUresult cuGraphInstantiateWithFlags(void **exec, void *graph, unsigned long long flags) { *exec = graph; return 0; }
+CUresult cuGraphExecUpdate_v2(void *exec, void *graph, void *info) { return 0; }
+CUresult cuGraphExecKernelNodeSetParams_v2(void *exec, void *node, const CUDA_KERNEL_NODE_PARAMS *params) {
+  ++patches;
+  strncpy(patched, (const char *)params->func, 63);
+  patched_arg = *(uint64_t *)params->params[0];
+  return 0;
+}
+CUresult cuGraphLaunch(void *exec, void *stream) { ++replays; return 0; }
+CUresult cuGraphDestroy(void *graph) { return 0; }
+CUresult cuGraphExecDestroy(void *exec) { return 0; }
+CUresult cuEventCreate(void **event, unsigned flags) { *event = &function; return 0; }
+CUresult cuEventRecord(void *event, void *stream) { return 0; }
+CUresult cuEventQuery(void *event) { return 0; }
+CUresult cuEventElapsedTime_v2(float *ms, void *start, void *end) { *ms = 0.0f; return 0; }
+CUresult cuEventDestroy_v2(void *event) { return 0; }
+
+uint64_t triton_tvm_ffi_launches(void) { return launches; }
+void triton_tvm_ffi_set_devices(int count) { devices = count; }
+void triton_tvm_ffi_set_context(int device) { base = device; }
+int triton_tvm_ffi_load_device(void) { return load_device; }
+uint64_t triton_tvm_ffi_device_loads(int device) { return device_loads[device]; }
+uint64_t triton_tvm_ffi_loads(void) { return loads; }
+uint64_t triton_tvm_ffi_unloads(void) { return unloads; }
+uint64_t triton_tvm_ffi_allocs(void) { return allocs; }
+uint64_t triton_tvm_ffi_frees(void) { return frees; }
+const char *triton_tvm_ffi_launched(void) { return launched; }
+uint64_t triton_tvm_ffi_grid(void) { return grid; }
+uint64_t triton_tvm_ffi_tensormap_types(void) { return tensormap_types; }
+uint64_t triton_tvm_ffi_tensormap_fills(void) { return tensormap_fills; }
+uint64_t triton_tvm_ffi_captures(void) { return captures; }
+uint64_t triton_tvm_ffi_replays(void) { return replays; }
+uint64_t triton_tvm_ffi_patches(void) { return patches; }
+const char *triton_tvm_ffi_patched(void) { return patched; }
+uint64_t triton_tvm_ffi_patched_arg(void) { return patched_arg; }
+"""
+
+
+class StandinDriver(object):
+    def __init__(
+        self, target: GPUTarget = GPUTarget("cuda", 80, 32), *args, **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.target: GPUTarget = target
+
+    def get_current_target(self) -> GPUTarget:
+        return self.target
+
+
+def compile_driver() -> ctypes.CDLL:
+    directory: Path = (
+        Path(tempfile.gettempdir()) / f"triton-tvm-ffi-standin-{stable_hash(DRIVER)}"
+    )
+    driver: Path = directory / "libcuda.so"
+    if not driver.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            ["cc", "-x", "c", "-shared", "-fPIC", "-O2", "-", "-o", f"{driver}.tmp"],
+            input=DRIVER.encode("utf-8"),
+            check=True,
+        )
+        Path(f"{driver}.tmp").replace(driver)
+    standin: ctypes.CDLL = ctypes.CDLL(f"{driver}")
+    for counter in (
+        "launches",
+        "grid",
+        "loads",
+        "unloads",
+        "allocs",
+        "frees",
+        "tensormap_types",
+        "tensormap_fills",
+        "captures",
+        "replays",
+        "patches",
+        "patched_arg",
+    ):
+        getattr(standin, f"triton_tvm_ffi_{counter}").restype = ctypes.c_uint64
+    standin.triton_tvm_ffi_device_loads.restype = ctypes.c_uint64
+    standin.triton_tvm_ffi_launched.restype = ctypes.c_char_p
+    standin.triton_tvm_ffi_patched.restype = ctypes.c_char_p
+    return standin
+
+
+def wrapper_flags(standin: ctypes.CDLL) -> Dict[str, List[Any]]:
+    directory: Path = Path(standin._name).parent
+    return {
+        "extra_cflags": ["-std=c++20"],
+        "extra_include_paths": [
+            f"{Path(__file__).parents[1] / 'include'}",
+            f"{sysconfig.get_path('purelib')}/triton/backends/nvidia/include",
+            *torch.utils.cpp_extension.include_paths(),
+        ],
+        "extra_ldflags": [
+            "-Wl,--no-as-needed",
+            f"-L{directory}",
+            f"-Wl,-rpath,{directory}",
+            *[f"-L{path}" for path in torch.utils.cpp_extension.library_paths()],
+            *[
+                f"-Wl,-rpath,{path}"
+                for path in torch.utils.cpp_extension.library_paths()
+            ],
+            "-lcuda",
+            "-lc10",
+            "-ltorch",
+        ],
+    }
@@ -1,3 +1,4 @@
+#include "triton_tvm_ffi/grid.h"
 #include <ATen/DLConvertor.h>
 #include <ATen/dlpack.h>
 #include <tvm/ffi/extra/cuda/cubin_launcher.h>
@@ -17,12 +18,10 @@ tvm::ffi::Tensor Add(tvm::ffi::Tensor x, tvm::ffi::Tensor y) {
   at::Tensor otorch = at::empty_like(xtorch);
   int32_t numel = otorch.numel();
   tvm::ffi::Tensor output = tvm::ffi::Tensor::FromDLPack(at::toDLPack(otorch));
-  tvm::ffi::Function grid = tvm::ffi::Function::FromTyped(
-      [numel](const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta)
-          -> tvm::ffi::Tuple<int32_t, int32_t, int32_t> {
-        const int32_t BLOCK_SIZE = meta["BLOCK_SIZE"].cast<int32_t>();
-        return tvm::ffi::Tuple((numel + BLOCK_SIZE - 1) / BLOCK_SIZE, 1, 1);
-      });
+  auto grid = [numel](const auto &meta) -> triton_tvm_ffi::GridDim {
+    const int32_t BLOCK_SIZE = meta["BLOCK_SIZE"];
+    return {(numel + BLOCK_SIZE - 1) / BLOCK_SIZE, 1, 1};
+  };
   DLDevice device = x.device();
   void *stream = TVMFFIEnvGetStream(device.device_type, device.device_id);
   tvm::ffi::Array<tvm::ffi::Any> args = {x, y, output, numel, 1024};
@@ -16,7 +16,7 @@ Extra Credits:
 import os
 from pathlib import Path
 import time
-from typing import Sequence
+from typing import Optional, Tuple
 
 import torch
 import triton
@@ -730,81 +730,63 @@ class _attention_triton(torch.autograd.Function):
         return dq, dk, dv, None, None, None, None
 
 
-@triton_tvm_ffi.torch_wrap(
-    [_attn_fwd],
-    Path(__file__).parent / "attnfwd.cc",
-)
-def _attn_fwd_tvm_ffi(
+def _attn_fwd_fake(
     q: torch.Tensor, k: torch.Tensor, v: torch.Tensor, causal: bool, sm_scale: float
-) -> torch.Tensor: ...
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    return q.new_empty(q.shape[:3], dtype=torch.float32), torch.empty_like(q)
 
 
-@triton_tvm_ffi.torch_wrap(
-    [_attn_bwd_preprocess],
-    Path(__file__).parent / "attnbwdpre.cc",
-)
-def _attn_bwd_preprocess_tvm_ffi(
+def _attn_fwd_save(
+    inputs: Tuple[torch.Tensor, torch.Tensor, torch.Tensor, bool, float],
+    output: Tuple[torch.Tensor, torch.Tensor],
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, float]:
+    q, k, v, causal, sm_scale = inputs
+    M, o = output
+    return q, k, v, o, M, sm_scale
+
+
+def _attn_bwd_fake(
+    q: torch.Tensor,
+    k: torch.Tensor,
+    v: torch.Tensor,
     o: torch.Tensor,
+    m: torch.Tensor,
+    sm_scale: float,
+    dm: Optional[torch.Tensor],
     do: torch.Tensor,
-    mshape: Sequence[int],
-    head_dim: int,
-): ...
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    return torch.empty_like(q), torch.empty_like(k), torch.empty_like(v)
 
 
 @triton_tvm_ffi.torch_wrap(
-    [_attn_bwd],
+    [_attn_bwd_preprocess, _attn_bwd],
     Path(__file__).parent / "attnbwd.cc",
+    custom_op=True,
+    fake=_attn_bwd_fake,
 )
 def _attn_bwd_tvm_ffi(
     q: torch.Tensor,
     k: torch.Tensor,
     v: torch.Tensor,
+    o: torch.Tensor,
+    m: torch.Tensor,
     sm_scale: float,
+    dm: Optional[torch.Tensor],
     do: torch.Tensor,
-    m: torch.Tensor,
-    delta: torch.Tensor,
-    HEAD_DIM: int,
-): ...
-
-
-class _attention_tvm_ffi(_attention_triton):
-    @staticmethod
-    def forward(ctx, q, k, v, causal, sm_scale):
-        # shape constraints
-        HEAD_DIM_K = k.shape[-1]
-        M, o = _attn_fwd_tvm_ffi(q, k, v, causal, sm_scale)
-        M = torch.from_dlpack(M)
-        o = torch.from_dlpack(o)
-        ctx.save_for_backward(q, k, v, o, M)
-        ctx.sm_scale = sm_scale
-        ctx.HEAD_DIM = HEAD_DIM_K
-        ctx.causal = causal
-        return o
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]: ...
 
-    @staticmethod
-    def backward(ctx, do):
-        q, k, v, o, M = ctx.saved_tensors
-        delta = _attn_bwd_preprocess_tvm_ffi(
-            o,
-            do,
-            M.shape,
-            ctx.HEAD_DIM,
-        )
-        dq, dk, dv = _attn_bwd_tvm_ffi(
-            q,
-            k,
-            v,
-            ctx.sm_scale,
-            do,
-            M,
-            delta,
-            ctx.HEAD_DIM,
-        )
-        dq = torch.from_dlpack(dq)
-        dk = torch.from_dlpack(dk)
-        dv = torch.from_dlpack(dv)
 
-        return dq, dk, dv, None, None, None, None
+@triton_tvm_ffi.torch_wrap(
+    [_attn_fwd],
+    Path(__file__).parent / "attnfwd.cc",
+    custom_op=True,
+    fake=_attn_fwd_fake,
+    backward=_attn_bwd_tvm_ffi,
+    save=_attn_fwd_save,
+)
+def _attn_fwd_tvm_ffi(
+    q: torch.Tensor, k: torch.Tensor, v: torch.Tensor, causal: bool, sm_scale: float
+) -> Tuple[torch.Tensor, torch.Tensor]: ...
 
 
 def attn_torch(q, k, v, causal=False, sm_scale=1.0):
@@ -823,7 +805,7 @@ def attn_triton(q, k, v, causal=False, sm_scale=1.0):
 
 
 def attn_tvm_ffi(q, k, v, causal=False, sm_scale=1.0):
-    return _attention_tvm_ffi.apply(q, k, v, causal, sm_scale)
+    return _attn_fwd_tvm_ffi(q, k, v, causal, sm_scale)[1]
 
 
 if __name__ == "__main__":
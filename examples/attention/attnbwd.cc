@@ -8,6 +8,10 @@
 #include <tvm/ffi/function.h>
 #include <tvm/ffi/tvm_ffi.h>
 
+#ifndef _ATTN_BWD_PREPROCESS_STUB
+#define _ATTN_BWD_PREPROCESS_STUB(grid, device, stream, args, kwargs)
+#endif
+
 #ifndef _ATTN_BWD_STUB
 #define _ATTN_BWD_STUB(grid, device, stream, args, kwargs)
 #endif
@@ -18,12 +22,27 @@
 
 tvm::ffi::Tuple<tvm::ffi::Tensor, tvm::ffi::Tensor, tvm::ffi::Tensor>
 AttnBwd(tvm::ffi::Tensor q, tvm::ffi::Tensor k, tvm::ffi::Tensor v,
-        const double smScale, tvm::ffi::Tensor do_, tvm::ffi::Tensor m,
-        tvm::ffi::Tensor delta, const int32_t kHeadDim) {
+        tvm::ffi::Tensor o, tvm::ffi::Tensor m, const double smScale,
+        tvm::ffi::Optional<tvm::ffi::Tensor> dm, tvm::ffi::Tensor do_) {
   tvm::ffi::ShapeView qshape = q.shape(), qstride = q.strides();
   const int32_t kBatch = qshape[0], kNHead = qshape[1], kNCtx = qshape[2],
-                kBlockN1 = 128;
+                kHeadDim = k.shape()[3], kPreBlock = 128, kBlockN1 = 128;
   const double kArgKScale = smScale / log(2);
+  DLDevice device = q.device();
+  void *stream = TVMFFIEnvGetStream(device.device_type, device.device_id);
+  at::Tensor deltaTorch = at::empty_like(at::fromDLPack(m.ToDLPack()));
+  tvm::ffi::Tensor delta =
+      tvm::ffi::Tensor::FromDLPack(at::toDLPack(deltaTorch));
+  tvm::ffi::Tuple<int32_t, int32_t, int32_t> preGrid(kNCtx / kPreBlock,
+                                                     kBatch * kNHead, 1);
+  tvm::ffi::Array<tvm::ffi::Any> preArgs = {o, do_, delta, kBatch, kNHead};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> preKwargs = {
+      {"N_CTX", kNCtx},
+      {"BLOCK_M", kPreBlock},
+      {"HEAD_DIM", kHeadDim},
+  };
+  _ATTN_BWD_PREPROCESS_STUB(preGrid, device.device_id, stream, preArgs,
+                            preKwargs);
   at::Tensor qTorch = at::fromDLPack(q.ToDLPack()),
              kTorch = at::fromDLPack(k.ToDLPack()),
              vTorch = at::fromDLPack(v.ToDLPack()),
@@ -44,8 +63,6 @@ AttnBwd(tvm::ffi::Tensor q, tvm::ffi::Tensor k, tvm::ffi::Tensor v,
       {"BLOCK_N2", 32}, {"BLK_SLICE_FACTOR", 2}, {"HEAD_DIM", kHeadDim},
       {"num_warps", 4}, {"num_stages", 5},
   };
-  DLDevice device = q.device();
-  void *stream = TVMFFIEnvGetStream(device.device_type, device.device_id);
   _ATTN_BWD_STUB(grid, device.device_id, stream, args, kwargs);
   return tvm::ffi::Tuple{dq, dk, dv};
 }
@@ -1,3 +1,4 @@
+#include "triton_tvm_ffi/grid.h"
 #include <ATen/DLConvertor.h>
 #include <ATen/core/ATen_fwd.h>
 #include <ATen/dlpack.h>
@@ -28,13 +29,10 @@ AttnFwd(tvm::ffi::Tensor q, tvm::ffi::Tensor k, tvm::ffi::Tensor v, bool casual,
                  at::empty({kB, kH, kN}, qTorch.options().dtype(at::kFloat));
   tvm::ffi::Tensor o = tvm::ffi::Tensor::FromDLPack(at::toDLPack(oTorch)),
                    m = tvm::ffi::Tensor::FromDLPack(at::toDLPack(mTorch));
-  tvm::ffi::Function grid = tvm::ffi::Function::FromTyped(
-      [kB, kH, kN](const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta)
-          -> tvm::ffi::Tuple<int32_t, int32_t, int32_t> {
-        const int32_t kBlockM = meta["BLOCK_M"].cast<int32_t>();
-        return tvm::ffi::Tuple<int32_t, int32_t, int32_t>(
-            (kN + kBlockM - 1) / kBlockM, kB * kH, 1);
-      });
+  auto grid = [kB, kH, kN](const auto &meta) -> triton_tvm_ffi::GridDim {
+    const int32_t kBlockM = meta["BLOCK_M"];
+    return {(kN + kBlockM - 1) / kBlockM, kB * kH, 1};
+  };
   tvm::ffi::Array<tvm::ffi::Any> args = {smScale, m, kB, kH, q, k, v, o, kN};
   tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {
       {"HEAD_DIM", kK},
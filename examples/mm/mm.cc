@@ -1,3 +1,4 @@
+#include "triton_tvm_ffi/grid.h"
 #include <ATen/DLConvertor.h>
 #include <ATen/dlpack.h>
 #include <tvm/ffi/extra/cuda/cubin_launcher.h>
@@ -17,16 +18,13 @@ tvm::ffi::Tensor Matmul(tvm::ffi::Tensor a, tvm::ffi::Tensor b,
              btorch = at::fromDLPack(b.ToDLPack());
   const int32_t M = atorch.size(0), K = atorch.size(1), N = btorch.size(1);
   at::Tensor ctorch = at::empty({M, N}, atorch.options());
-  tvm::ffi::Function grid = tvm::ffi::Function::FromTyped(
-      [M, N](const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta)
-          -> tvm::ffi::Tuple<int32_t, int32_t, int32_t> {
-        const int32_t BLOCK_SIZE_M = meta["BLOCK_SIZE_M"].cast<int32_t>(),
-                      BLOCK_SIZE_N = meta["BLOCK_SIZE_N"].cast<int32_t>();
-        return tvm::ffi::Tuple<int32_t, int32_t, int32_t>{
-            (M + BLOCK_SIZE_M - 1) / BLOCK_SIZE_M *
+  auto grid = [M, N](const auto &meta) -> triton_tvm_ffi::GridDim {
+    const int32_t BLOCK_SIZE_M = meta["BLOCK_SIZE_M"],
+                  BLOCK_SIZE_N = meta["BLOCK_SIZE_N"];
+    return {(M + BLOCK_SIZE_M - 1) / BLOCK_SIZE_M *
                 ((N + BLOCK_SIZE_N - 1) / BLOCK_SIZE_N),
             1, 1};
-      });
+  };
   DLDevice device = a.device();
   void *stream = TVMFFIEnvGetStream(device.device_type, device.device_id);
   tvm::ffi::Tensor c = tvm::ffi::Tensor::FromDLPack(at::toDLPack(ctorch));
@@ -0,0 +1,227 @@
+#ifndef TRITON_TVM_FFI_GRAPH_H_
+#define TRITON_TVM_FFI_GRAPH_H_
+
+#include "macro.h"
+#include <cstddef>
+#include <cstdint>
+#include <cuda.h>
+#include <string_view>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+namespace triton_tvm_ffi {
+
+constexpr int32_t kGraphIdle = 0;
+constexpr int32_t kGraphCapture = 1;
+constexpr int32_t kGraphPatch = 2;
+
+struct Graph {
+  CUgraph graph = nullptr;
+  CUgraphExec exec = nullptr;
+  bool tracked = false;
+  bool patchable = false;
+  bool patched = false;
+  std::unordered_map<std::string_view, std::vector<CUgraphNode>> nodes;
+  std::unordered_map<std::string_view, std::vector<CUgraphNode>> captured;
+  std::unordered_map<std::string_view, size_t> cursors;
+};
+
+template <const char kModule[]> struct GraphRecorder {
+  static inline thread_local Graph *graph = nullptr;
+  static inline thread_local int32_t mode = kGraphIdle;
+
+  static inline void Record(Graph *target, int32_t next) {
+    graph = next == kGraphIdle ? nullptr : target;
+    mode = graph == nullptr ? kGraphIdle : next;
+    if (mode == kGraphCapture) {
+      graph->captured[kModule].clear();
+    } else if (mode == kGraphPatch) {
+      graph->cursors[kModule] = 0;
+    }
+  }
+
+  static inline void Capture(void *stream) {
+    CUstreamCaptureStatus status;
+    const CUgraphNode *deps = nullptr;
+    size_t count = 0;
+#if CUDA_VERSION >= 13000
+    __CUDA_CHECK(cuStreamGetCaptureInfo(reinterpret_cast<CUstream>(stream),
+                                        &status, nullptr, nullptr, &deps,
+                                        nullptr, &count));
+#else
+    __CUDA_CHECK(cuStreamGetCaptureInfo_v2(reinterpret_cast<CUstream>(stream),
+                                           &status, nullptr, nullptr, &deps,
+                                           &count));
+#endif
+    if (status != CU_STREAM_CAPTURE_STATUS_ACTIVE || count != 1) {
+      graph->tracked = false;
+      return;
+    }
+    graph->captured[kModule].push_back(deps[0]);
+  }
+
+  static inline bool Skip() {
+    if (mode != kGraphPatch) {
+      return false;
+    }
+    graph->patched = false;
+    return true;
+  }
+
+  static inline void Patch(CUfunction function, unsigned int gridX,
+                           unsigned int gridY, unsigned int gridZ,
+                           unsigned int blockX, unsigned int smem,
+                           void **params) {
+    std::vector<CUgraphNode> &nodes = graph->nodes[kModule];
+    size_t &cursor = graph->cursors[kModule];
+    if (!graph->patched || cursor >= nodes.size()) {
+      graph->patched = false;
+      return;
+    }
+    CUDA_KERNEL_NODE_PARAMS node = {};
+    node.func = function;
+    node.gridDimX = gridX;
+    node.gridDimY = gridY;
+    node.gridDimZ = gridZ;
+    node.blockDimX = blockX;
+    node.blockDimY = 1;
+    node.blockDimZ = 1;
+    node.sharedMemBytes = smem;
+    node.kernelParams = params;
+    graph->patched = cuGraphExecKernelNodeSetParams(
+                         graph->exec, nodes[cursor++], &node) == CUDA_SUCCESS;
+  }
+};
+
+// Relaxed mode lets GetKernel lazily load modules and query function
+// attributes while the stream is capturing, which the global and
+// thread-local modes reject as unsafe calls.
+inline Graph *BeginCapture(void *stream, Graph *graph) {
+  Graph *target = graph != nullptr ? graph : new Graph();
+  target->tracked = true;
+  target->captured.clear();
+  CUresult result = cuStreamBeginCapture(reinterpret_cast<CUstream>(stream),
+                                         CU_STREAM_CAPTURE_MODE_RELAXED);
+  if (result != CUDA_SUCCESS && graph == nullptr) {
+    delete target;
+  }
+  __CUDA_CHECK(result);
+  return target;
+}
+
+inline CUgraphExec InstantiateGraph(CUgraph graph) {
+  CUgraphExec exec;
+  __CUDA_CHECK(cuGraphInstantiateWithFlags(&exec, graph, 0));
+  return exec;
+}
+
+inline bool UpdateGraph(CUgraphExec exec, CUgraph graph) {
+#if CUDA_VERSION >= 12000
+  CUgraphExecUpdateResultInfo info;
+  return cuGraphExecUpdate(exec, graph, &info) == CUDA_SUCCESS;
+#else
+  CUgraphNode node;
+  CUgraphExecUpdateResult result;
+  return cuGraphExecUpdate(exec, graph, &node, &result) == CUDA_SUCCESS;
+#endif
+}
+
+inline bool SameNodes(
+    const std::unordered_map<std::string_view, std::vector<CUgraphNode>> &lhs,
+    const std::unordered_map<std::string_view, std::vector<CUgraphNode>> &rhs) {
+  size_t count = 0;
+  for (const auto &[module, nodes] : lhs) {
+    auto it = rhs.find(module);
+    if (nodes.empty()) {
+      continue;
+    } else if (it == rhs.end() || it->second.size() != nodes.size()) {
+      return false;
+    }
+    count += nodes.size();
+  }
+  for (const auto &[module, nodes] : rhs) {
+    count -= nodes.size();
+  }
+  return count == 0;
+}
+
+inline void EndCapture(void *stream, Graph *graph, bool commit) {
+  CUgraph captured;
+  __CUDA_CHECK(
+      cuStreamEndCapture(reinterpret_cast<CUstream>(stream), &captured));
+  try {
+    if (!commit) {
+      graph->captured.clear();
+    } else if (graph->exec != nullptr && UpdateGraph(graph->exec, captured) &&
+               SameNodes(graph->nodes, graph->captured)) {
+      graph->captured.clear();
+    } else {
+      size_t count = 0;
+      size_t kernels = 0;
+      __CUDA_CHECK(cuGraphGetNodes(captured, nullptr, &count));
+      for (const auto &[module, nodes] : graph->captured) {
+        kernels += nodes.size();
+      }
+      CUgraphExec exec = InstantiateGraph(captured);
+      if (graph->exec != nullptr) {
+        __CUDA_CHECK(cuGraphExecDestroy(graph->exec));
+      }
+      if (graph->graph != nullptr) {
+        __CUDA_CHECK(cuGraphDestroy(graph->graph));
+      }
+      graph->exec = exec;
+      graph->graph = std::exchange(captured, nullptr);
+      graph->nodes = std::move(graph->captured);
+      graph->captured.clear();
+      graph->patchable = graph->tracked && count == kernels;
+    }
+  } catch (...) {
+    if (captured != nullptr) {
+      cuGraphDestroy(captured);
+    }
+    throw;
+  }
+  if (captured != nullptr) {
+    __CUDA_CHECK(cuGraphDestroy(captured));
+  }
+}
+
+// Patching replays the wrapper without launching and rewrites the captured
+// kernel nodes, so it is only attempted on graphs made entirely of tracked
+// native launches; a launch that would take the Python fallback is skipped
+// and forces a re-capture instead of running twice.
+inline bool BeginPatch(Graph *graph) {
+  graph->patched = graph->patchable && graph->exec != nullptr;
+  graph->cursors.clear();
+  return graph->patched;
+}
+
+inline bool EndPatch(Graph *graph) {
+  for (const auto &[module, nodes] : graph->nodes) {
+    auto it = graph->cursors.find(module);
+    if (it == graph->cursors.end() ? !nodes.empty()
+                                   : it->second != nodes.size()) {
+      graph->patched = false;
+    }
+  }
+  return graph->patched;
+}
+
+inline void LaunchGraph(Graph *graph, void *stream) {
+  __CUDA_CHECK(cuGraphLaunch(graph->exec, reinterpret_cast<CUstream>(stream)));
+}
+
+inline void DestroyGraph(Graph *graph) {
+  if (graph->exec != nullptr) {
+    __CUDA_CHECK(cuGraphExecDestroy(graph->exec));
+  }
+  if (graph->graph != nullptr) {
+    __CUDA_CHECK(cuGraphDestroy(graph->graph));
+  }
+  delete graph;
+}
+
+} // namespace triton_tvm_ffi
+
+#endif
@@ -1,32 +1,92 @@
 #ifndef TRITON_TVM_FFI_GRID_H_
 #define TRITON_TVM_FFI_GRID_H_
 
+#include <array>
 #include <cstdint>
+#include <string_view>
+#include <tuple>
 #include <tvm/ffi/tvm_ffi.h>
+#include <type_traits>
 
 namespace triton_tvm_ffi {
 
-template <typename T>
-inline tvm::ffi::Tuple<int32_t, int32_t, int32_t>
-MakeGridDim(const T &grid,
-            const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta);
-
-template <>
-inline tvm::ffi::Tuple<int32_t, int32_t, int32_t>
-MakeGridDim<tvm::ffi::Tuple<int32_t, int32_t, int32_t>>(
-    const tvm::ffi::Tuple<int32_t, int32_t, int32_t> &grid,
-    const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &) {
-  return grid;
+using GridDim = std::array<int32_t, 3>;
+
+struct MapMeta {
+  const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta;
+
+  int64_t operator[](std::string_view key) const {
+    return meta[tvm::ffi::String(key.data(), key.size())].cast<int64_t>();
+  }
+};
+
+inline GridDim ToGridDim(const GridDim &grid) { return grid; }
+
+inline GridDim
+ToGridDim(const tvm::ffi::Tuple<int32_t, int32_t, int32_t> &grid) {
+  return {grid.get<0>(), grid.get<1>(), grid.get<2>()};
+}
+
+template <typename X, typename Y, typename Z>
+inline GridDim ToGridDim(const std::tuple<X, Y, Z> &grid) {
+  return {static_cast<int32_t>(std::get<0>(grid)),
+          static_cast<int32_t>(std::get<1>(grid)),
+          static_cast<int32_t>(std::get<2>(grid))};
+}
+
+template <typename T,
+          typename = std::enable_if_t<std::is_integral_v<std::decay_t<T>>>>
+inline GridDim ToGridDim(T grid) {
+  return {static_cast<int32_t>(grid), 1, 1};
+}
+
+template <typename M>
+inline GridDim
+MakeGridDim(const tvm::ffi::Tuple<int32_t, int32_t, int32_t> &grid,
+            const M &) {
+  return ToGridDim(grid);
+}
+
+template <typename M>
+inline GridDim MakeGridDim(const tvm::ffi::Function &grid, const M &meta) {
+  return ToGridDim(
+      grid(meta.ToMap())
+          .template cast<tvm::ffi::Tuple<int32_t, int32_t, int32_t>>());
+}
+
+template <typename G, typename M>
+inline GridDim MakeGridDim(const G &grid, const M &meta) {
+  if constexpr (std::is_invocable_v<const G &, const M &>) {
+    return ToGridDim(grid(meta));
+  } else if constexpr (std::is_invocable_v<const G &>) {
+    return ToGridDim(grid());
+  } else {
+    return ToGridDim(grid);
+  }
 }
 
-template <>
-inline tvm::ffi::Tuple<int32_t, int32_t, int32_t>
-MakeGridDim<tvm::ffi::Function>(
-    const tvm::ffi::Function &grid,
-    const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta) {
-  tvm::ffi::Tuple<int32_t, int32_t, int32_t> tuple =
-      grid(meta).cast<tvm::ffi::Tuple<int32_t, int32_t, int32_t>>();
-  return MakeGridDim(tuple, meta);
+template <typename G> inline tvm::ffi::Any ToFFIGrid(const G &grid) {
+  if constexpr (std::is_same_v<G, tvm::ffi::Function> ||
+                std::is_same_v<G, tvm::ffi::Tuple<int32_t, int32_t, int32_t>>) {
+    return grid;
+  } else if constexpr (std::is_invocable_v<const G &, const MapMeta &> ||
+                       std::is_invocable_v<const G &>) {
+    return tvm::ffi::Function::FromTyped(
+        [grid](const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta)
+            -> tvm::ffi::Tuple<int32_t, int32_t, int32_t> {
+          GridDim dim;
+          if constexpr (std::is_invocable_v<const G &, const MapMeta &>) {
+            dim = ToGridDim(grid(MapMeta{meta}));
+          } else {
+            dim = ToGridDim(grid());
+          }
+          return tvm::ffi::Tuple<int32_t, int32_t, int32_t>(dim[0], dim[1],
+                                                            dim[2]);
+        });
+  } else {
+    GridDim dim = ToGridDim(grid);
+    return tvm::ffi::Tuple<int32_t, int32_t, int32_t>(dim[0], dim[1], dim[2]);
+  }
 }
 
 } // namespace triton_tvm_ffi
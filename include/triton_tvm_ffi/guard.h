@@ -0,0 +1,159 @@
+#ifndef TRITON_TVM_FFI_GUARD_H_
+#define TRITON_TVM_FFI_GUARD_H_
+
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <optional>
+#include "types.h"
+#include <string_view>
+#include <tvm/ffi/tvm_ffi.h>
+#include <type_traits>
+
+namespace triton_tvm_ffi {
+
+template <const char K[]> inline const tvm::ffi::String &Key() {
+  static const tvm::ffi::String key(K);
+  return key;
+}
+
+template <const char K[]>
+inline std::optional<tvm::ffi::Any>
+GetArg(const tvm::ffi::Array<tvm::ffi::Any> &args,
+       const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &kwargs,
+       size_t index) {
+  if (index < args.size()) {
+    return args[index];
+  } else if (kwargs.empty()) {
+    return std::nullopt;
+  } else {
+    return kwargs.Get(Key<K>());
+  }
+}
+
+inline bool IsAligned(const std::optional<tvm::ffi::Any> &val, int64_t align) {
+  if (!val.has_value()) {
+    return false;
+  } else if (auto tensor = val->try_cast<tvm::ffi::TensorView>()) {
+    return reinterpret_cast<uintptr_t>(tensor->data_ptr()) % align == 0;
+  } else if (auto integer = val->try_cast<int64_t>()) {
+    return *integer % align == 0;
+  } else {
+    return false;
+  }
+}
+
+inline bool HasDType(const std::optional<tvm::ffi::Any> &val, uint8_t code,
+                     uint8_t bits) {
+  if (!val.has_value()) {
+    return false;
+  } else if (auto tensor = val->try_cast<tvm::ffi::TensorView>()) {
+    DLDataType dtype = tensor->dtype();
+    return dtype.code == code && dtype.bits == bits && dtype.lanes == 1;
+  } else {
+    return false;
+  }
+}
+
+inline bool FitsInt32(const std::optional<tvm::ffi::Any> &val) {
+  if (!val.has_value()) {
+    return false;
+  } else if (auto integer = val->try_cast<int64_t>()) {
+    return *integer >= std::numeric_limits<int32_t>::min() &&
+           *integer <= std::numeric_limits<int32_t>::max();
+  } else {
+    return false;
+  }
+}
+
+template <typename T>
+inline bool Equals(const std::optional<tvm::ffi::Any> &val, const T &expected,
+                   bool fallback) {
+  if (!val.has_value()) {
+    return fallback;
+  } else if (auto value = val->try_cast<T>()) {
+    return *value == expected;
+  } else {
+    return false;
+  }
+}
+
+inline bool Equals(const std::optional<tvm::ffi::Any> &val,
+                   const char *expected, bool fallback) {
+  if (!val.has_value()) {
+    return fallback;
+  } else if (auto value = val->try_cast<tvm::ffi::String>()) {
+    return std::strcmp(value->c_str(), expected) == 0;
+  } else {
+    return false;
+  }
+}
+
+inline bool IsNone(const std::optional<tvm::ffi::Any> &val, bool fallback) {
+  if (!val.has_value()) {
+    return fallback;
+  } else {
+    return val->type_index() == tvm::ffi::TypeIndex::kTVMFFINone;
+  }
+}
+
+template <typename V> inline bool IsAligned(const V &val, int64_t align) {
+  if constexpr (kIsTensor<V>) {
+    return reinterpret_cast<uintptr_t>(val.data_ptr()) % align == 0;
+  } else if constexpr (std::is_pointer_v<V>) {
+    return reinterpret_cast<uintptr_t>(val) % align == 0;
+  } else if constexpr (std::is_integral_v<V>) {
+    return static_cast<int64_t>(val) % align == 0;
+  } else {
+    return false;
+  }
+}
+
+template <typename V>
+inline bool HasDType(const V &val, uint8_t code, uint8_t bits) {
+  if constexpr (kIsTensor<V>) {
+    DLDataType dtype = val.dtype();
+    return dtype.code == code && dtype.bits == bits && dtype.lanes == 1;
+  } else {
+    return false;
+  }
+}
+
+template <typename V> inline bool FitsInt32(const V &val) {
+  if constexpr (std::is_integral_v<V>) {
+    return static_cast<int64_t>(val) >= std::numeric_limits<int32_t>::min() &&
+           static_cast<int64_t>(val) <= std::numeric_limits<int32_t>::max();
+  } else {
+    return false;
+  }
+}
+
+template <typename V> inline bool IsNone(const V &, bool fallback) {
+  if constexpr (std::is_same_v<V, std::nullptr_t>) {
+    return true;
+  } else if constexpr (std::is_same_v<V, std::nullopt_t>) {
+    return fallback;
+  } else {
+    return false;
+  }
+}
+
+template <typename V, typename T>
+inline bool Equals(const V &val, const T &expected, bool) {
+  if constexpr (std::is_convertible_v<const V &, std::string_view> &&
+                std::is_convertible_v<const T &, std::string_view>) {
+    return std::string_view(val) == std::string_view(expected);
+  } else if constexpr (std::is_same_v<V, tvm::ffi::String> &&
+                       std::is_convertible_v<const T &, std::string_view>) {
+    return std::string_view(val.data(), val.size()) ==
+           std::string_view(expected);
+  } else if constexpr (std::is_arithmetic_v<V> && std::is_arithmetic_v<T>) {
+    return val == expected;
+  } else {
+    return false;
+  }
+}
+
+} // namespace triton_tvm_ffi
+
+#endif
@@ -2,38 +2,117 @@
 #define TRITON_TVM_FFI_KERNEL_H_
 
 #include "macro.h"
+#include <array>
+#include <atomic>
 #include <cstdint>
 #include <cuda.h>
-#include <unordered_map>
+#include <mutex>
+#include <stdexcept>
+#include <string>
 
 namespace triton_tvm_ffi {
 
+constexpr int32_t kMaxDevices = 64;
+
+template <typename F> inline void WithDevice(int32_t device, F &&f) {
+  CUdevice handle;
+  CUcontext context;
+  __CUDA_CHECK(cuDeviceGet(&handle, device));
+  __CUDA_CHECK(cuDevicePrimaryCtxRetain(&context, handle));
+  __CUDA_CHECK(cuCtxPushCurrent(context));
+  try {
+    f();
+  } catch (...) {
+    cuCtxPopCurrent(&context);
+    throw;
+  }
+  __CUDA_CHECK(cuCtxPopCurrent(&context));
+}
+
 template <const char kFnName[], const char kCubin[], size_t kSMem>
-inline CUfunction GetKernel(int32_t device) {
-  static std::unordered_map<int32_t, CUfunction> functions = {};
-  if (functions.find(device) == functions.end()) {
+struct KernelTable {
+  static inline std::array<std::atomic<CUfunction>, kMaxDevices> functions =
+      {};
+  static inline std::array<CUmodule, kMaxDevices> modules = {};
+  static inline std::mutex mutex;
+
+  static inline CUfunction Get(int32_t device) {
+    if (device < 0 || device >= kMaxDevices) {
+      throw std::out_of_range("device " + std::to_string(device) +
+                              " exceeds the kernel handle table");
+    }
+    CUfunction func = functions[device].load(std::memory_order_acquire);
+    return func != nullptr ? func : Load(device);
+  }
+
+  static inline CUfunction Load(int32_t device) {
+    std::lock_guard<std::mutex> lock(mutex);
+    if (CUfunction func = functions[device].load(std::memory_order_relaxed)) {
+      return func;
+    }
     CUmodule module;
     CUfunction func;
-    __CUDA_CHECK(cuModuleLoadData(&module, kCubin));
-    __CUDA_CHECK(cuModuleGetFunction(&func, module, kFnName));
-    if (kSMem > 49152) {
-      int32_t shared_optin, shared_static;
-      __CUDA_CHECK(cuDeviceGetAttribute(
-          &shared_optin, CU_DEVICE_ATTRIBUTE_MAX_SHARED_MEMORY_PER_BLOCK_OPTIN,
-          device));
-      if (shared_optin >= kSMem) {
-        __CUDA_CHECK(cuFuncGetAttribute(
-            &shared_static, CU_FUNC_ATTRIBUTE_SHARED_SIZE_BYTES, func));
-        __CUDA_CHECK(cuFuncSetAttribute(
-            func, CU_FUNC_ATTRIBUTE_MAX_DYNAMIC_SHARED_SIZE_BYTES,
-            shared_optin - shared_static));
+    WithDevice(device, [&]() {
+      __CUDA_CHECK(cuModuleLoadData(&module, kCubin));
+      __CUDA_CHECK(cuModuleGetFunction(&func, module, kFnName));
+      if (kSMem > 49152) {
+        int32_t shared_optin, shared_static;
+        __CUDA_CHECK(cuDeviceGetAttribute(
+            &shared_optin,
+            CU_DEVICE_ATTRIBUTE_MAX_SHARED_MEMORY_PER_BLOCK_OPTIN, device));
+        if (shared_optin >= kSMem) {
+          __CUDA_CHECK(cuFuncGetAttribute(
+              &shared_static, CU_FUNC_ATTRIBUTE_SHARED_SIZE_BYTES, func));
+          __CUDA_CHECK(cuFuncSetAttribute(
+              func, CU_FUNC_ATTRIBUTE_MAX_DYNAMIC_SHARED_SIZE_BYTES,
+              shared_optin - shared_static));
+        }
       }
+    });
+    modules[device] = module;
+    functions[device].store(func, std::memory_order_release);
+    return func;
+  }
+
+  static inline size_t Resident() {
+    std::lock_guard<std::mutex> lock(mutex);
+    size_t count = 0;
+    for (CUmodule module : modules) {
+      count += module != nullptr;
     }
-    functions[device] = func;
+    return count;
   }
-  return functions[device];
+
+  static inline size_t Unload() {
+    std::lock_guard<std::mutex> lock(mutex);
+    size_t count = 0;
+    for (int32_t device = 0; device < kMaxDevices; ++device) {
+      if (CUmodule module = modules[device]) {
+        functions[device].store(nullptr, std::memory_order_release);
+        WithDevice(device,
+                   [module]() { __CUDA_CHECK(cuModuleUnload(module)); });
+        modules[device] = nullptr;
+        ++count;
+      }
+    }
+    return count;
+  }
+};
+
+template <const char kFnName[], const char kCubin[], size_t kSMem>
+inline CUfunction GetKernel(int32_t device) {
+  return KernelTable<kFnName, kCubin, kSMem>::Get(device);
 };
 
+template <typename F> inline void ForEachDevice(F &&f) {
+  int32_t count;
+  __CUDA_CHECK(cuInit(0));
+  __CUDA_CHECK(cuDeviceGetCount(&count));
+  for (int32_t device = 0; device < count && device < kMaxDevices; ++device) {
+    WithDevice(device, [&]() { f(device); });
+  }
+}
+
 } // namespace triton_tvm_ffi
 
 #endif
@@ -0,0 +1,78 @@
+#ifndef TRITON_TVM_FFI_LAUNCH_H_
+#define TRITON_TVM_FFI_LAUNCH_H_
+
+#include "graph.h"
+#include "grid.h"
+#include "macro.h"
+#include <cstddef>
+#include <cstdint>
+#include <cuda.h>
+
+namespace triton_tvm_ffi {
+
+template <const char kModule[], int32_t kNumWarps, size_t kSMem,
+          int32_t kClusterX = 1, int32_t kClusterY = 1, int32_t kClusterZ = 1,
+          bool kCooperative = false, bool kPDL = false>
+inline void Launch(CUfunction function, const GridDim &grid, void *stream,
+                   void **params) {
+  constexpr int32_t kClusterSize = kClusterX * kClusterY * kClusterZ;
+  constexpr size_t kNumAttrs = (kClusterSize > 1 ? 2 : 0) + kCooperative + kPDL;
+  if (grid[0] <= 0 || grid[1] <= 0 || grid[2] <= 0) {
+    return;
+  }
+  if (GraphRecorder<kModule>::mode == kGraphPatch) [[unlikely]] {
+    GraphRecorder<kModule>::Patch(function, grid[0] * kClusterX,
+                                  grid[1] * kClusterY, grid[2] * kClusterZ,
+                                  32 * kNumWarps, kSMem, params);
+    return;
+  }
+  if constexpr (kNumAttrs == 0) {
+    __CUDA_CHECK(cuLaunchKernel(function, grid[0], grid[1], grid[2],
+                                32 * kNumWarps, 1, 1, kSMem,
+                                reinterpret_cast<CUstream>(stream), params,
+                                nullptr));
+  } else {
+    CUlaunchAttribute attrs[kNumAttrs] = {};
+    size_t count = 0;
+    if constexpr (kPDL) {
+      attrs[count].id = CU_LAUNCH_ATTRIBUTE_PROGRAMMATIC_STREAM_SERIALIZATION;
+      attrs[count++].value.programmaticStreamSerializationAllowed = 1;
+    }
+    if constexpr (kCooperative) {
+      attrs[count].id = CU_LAUNCH_ATTRIBUTE_COOPERATIVE;
+      attrs[count++].value.cooperative = 1;
+    }
+    if constexpr (kClusterSize > 1) {
+      attrs[count].id = CU_LAUNCH_ATTRIBUTE_CLUSTER_DIMENSION;
+      attrs[count].value.clusterDim.x = kClusterX;
+      attrs[count].value.clusterDim.y = kClusterY;
+      attrs[count++].value.clusterDim.z = kClusterZ;
+      attrs[count].id = CU_LAUNCH_ATTRIBUTE_CLUSTER_SCHEDULING_POLICY_PREFERENCE;
+      attrs[count++].value.clusterSchedulingPolicyPreference =
+          CU_CLUSTER_SCHEDULING_POLICY_SPREAD;
+    }
+    if constexpr (kClusterSize > 8) {
+      __CUDA_CHECK(cuFuncSetAttribute(
+          function, CU_FUNC_ATTRIBUTE_NON_PORTABLE_CLUSTER_SIZE_ALLOWED, 1));
+    }
+    CUlaunchConfig config = {};
+    config.gridDimX = grid[0] * kClusterX;
+    config.gridDimY = grid[1] * kClusterY;
+    config.gridDimZ = grid[2] * kClusterZ;
+    config.blockDimX = 32 * kNumWarps;
+    config.blockDimY = 1;
+    config.blockDimZ = 1;
+    config.sharedMemBytes = kSMem;
+    config.hStream = reinterpret_cast<CUstream>(stream);
+    config.attrs = attrs;
+    config.numAttrs = kNumAttrs;
+    __CUDA_CHECK(cuLaunchKernelEx(&config, function, params, nullptr));
+  }
+  if (GraphRecorder<kModule>::mode == kGraphCapture) [[unlikely]] {
+    GraphRecorder<kModule>::Capture(stream);
+  }
+}
+
+} // namespace triton_tvm_ffi
+
+#endif
@@ -1,7 +1,13 @@
 #ifndef TRITON_TVM_FFI_META_H_
 #define TRITON_TVM_FFI_META_H_
 
+#include "guard.h"
+#include <optional>
+#include <string_view>
+#include <tuple>
 #include <tvm/ffi/tvm_ffi.h>
+#include <type_traits>
+#include <utility>
 
 namespace triton_tvm_ffi {
 
@@ -28,9 +34,9 @@ template <const char K[], const char... Ks[]> struct FillMetaImpl<K, Ks...> {
         const tvm::ffi::Array<tvm::ffi::Any>::iterator &argsEnd,
         const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &kwargs) {
     if (argsBegin != argsEnd) {
-      meta.Set(K, *argsBegin++);
-    } else if (auto val = kwargs.Get(K)) {
-      meta.Set(K, *val);
+      meta.Set(Key<K>(), *argsBegin++);
+    } else if (auto val = kwargs.Get(Key<K>())) {
+      meta.Set(Key<K>(), *val);
     }
     FillMetaImpl<Ks...>::apply(meta, argsBegin, argsEnd, kwargs);
   }
@@ -47,6 +53,72 @@ template <const char... Ks[]> struct FillMeta {
   }
 };
 
+template <const char... Ks[]> struct LookupMeta {
+  static inline int64_t
+  apply(std::string_view key, const tvm::ffi::Array<tvm::ffi::Any> &args,
+        const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &kwargs) {
+    size_t index = 0;
+    std::optional<tvm::ffi::Any> val = std::nullopt;
+    ((key == Ks ? (val = GetArg<Ks>(args, kwargs, index), true)
+                : (++index, false)) ||
+     ...);
+    if (!val.has_value()) {
+      TVM_FFI_THROW(KeyError) << "no meta value named " << key;
+    }
+    return val->cast<int64_t>();
+  }
+};
+
+template <const char... Ks[]> struct PackedArgs {
+  const tvm::ffi::Array<tvm::ffi::Any> &args;
+  const tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &kwargs;
+
+  int64_t operator[](std::string_view key) const {
+    return LookupMeta<Ks...>::apply(key, args, kwargs);
+  }
+
+  void Fill(tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta) const {
+    FillMeta<Ks...>::apply(meta, args, kwargs);
+  }
+};
+
+template <typename Tuple, const char... Ks[]> struct TypedArgs {
+  Tuple values;
+
+  int64_t operator[](std::string_view key) const {
+    return Lookup(key, std::make_index_sequence<sizeof...(Ks)>{});
+  }
+
+  void Fill(tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta) const {
+    Fill(meta, std::make_index_sequence<sizeof...(Ks)>{});
+  }
+
+private:
+  template <size_t... Is>
+  int64_t Lookup(std::string_view key, std::index_sequence<Is...>) const {
+    std::optional<int64_t> val = std::nullopt;
+    ((key == Ks && (val = ToInt64(std::get<Is>(values)), true)) || ...);
+    if (!val.has_value()) {
+      TVM_FFI_THROW(KeyError) << "no meta value named " << key;
+    }
+    return *val;
+  }
+
+  template <size_t... Is>
+  void Fill(tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> &meta,
+            std::index_sequence<Is...>) const {
+    (meta.Set(Key<Ks>(), tvm::ffi::Any(std::get<Is>(values))), ...);
+  }
+
+  template <typename V> static std::optional<int64_t> ToInt64(const V &val) {
+    if constexpr (std::is_arithmetic_v<V>) {
+      return static_cast<int64_t>(val);
+    } else {
+      return std::nullopt;
+    }
+  }
+};
+
 } // namespace triton_tvm_ffi
 
 #endif
@@ -0,0 +1,82 @@
+#ifndef TRITON_TVM_FFI_SCRATCH_H_
+#define TRITON_TVM_FFI_SCRATCH_H_
+
+#include "grid.h"
+#include "macro.h"
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cuda.h>
+#include <map>
+#include <mutex>
+#include <utility>
+#include <vector>
+
+namespace triton_tvm_ffi {
+
+constexpr int32_t kGlobalScratch = 0;
+constexpr int32_t kProfileScratch = 1;
+
+struct ScratchBuffer {
+  CUdeviceptr ptr = 0;
+  size_t size = 0;
+};
+
+template <const char kModule[], int32_t kSlot> struct ScratchPool {
+  static inline std::mutex mutex;
+  static inline std::map<std::pair<int32_t, void *>, ScratchBuffer> buffers;
+  static inline std::vector<CUdeviceptr> retired;
+
+  static inline void *Get(int32_t device, void *stream, size_t size,
+                          size_t align) {
+    if (size == 0) {
+      return nullptr;
+    }
+    std::lock_guard<std::mutex> lock(mutex);
+    ScratchBuffer &buffer = buffers[{device, stream}];
+    size_t bytes = size + align - 1;
+    if (buffer.size < bytes) {
+      size_t capacity = std::max(bytes, buffer.size * 2);
+      CUdeviceptr ptr;
+      __CUDA_CHECK(cuMemAlloc(&ptr, capacity));
+      if (buffer.ptr != 0) {
+        retired.push_back(buffer.ptr);
+      }
+      buffer.ptr = ptr;
+      buffer.size = capacity;
+    }
+    return reinterpret_cast<void *>((buffer.ptr + align - 1) / align * align);
+  }
+
+  static inline size_t Release() {
+    std::lock_guard<std::mutex> lock(mutex);
+    size_t bytes = 0;
+    for (const auto &[key, buffer] : buffers) {
+      __CUDA_CHECK(cuMemFree(buffer.ptr));
+      bytes += buffer.size;
+    }
+    for (CUdeviceptr ptr : retired) {
+      __CUDA_CHECK(cuMemFree(ptr));
+    }
+    buffers.clear();
+    retired.clear();
+    return bytes;
+  }
+};
+
+template <const char kModule[], int32_t kSlot, size_t kSize, size_t kAlign,
+          int32_t kNumCtas>
+inline void *Scratch(int32_t device, void *stream, const GridDim &grid) {
+  if constexpr (kSize == 0) {
+    return nullptr;
+  } else {
+    return ScratchPool<kModule, kSlot>::Get(
+        device, stream,
+        static_cast<size_t>(grid[0]) * grid[1] * grid[2] * kNumCtas * kSize,
+        kAlign);
+  }
+}
+
+} // namespace triton_tvm_ffi
+
+#endif
@@ -0,0 +1,208 @@
+#ifndef TRITON_TVM_FFI_TELEMETRY_H_
+#define TRITON_TVM_FFI_TELEMETRY_H_
+
+#include "kernel.h"
+#include "macro.h"
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <cstdlib>
+#include <cuda.h>
+#include <mutex>
+#include <string_view>
+#include <tvm/ffi/tvm_ffi.h>
+#include <utility>
+#include <vector>
+
+namespace triton_tvm_ffi {
+
+constexpr int32_t kTelemetryOff = 0;
+constexpr int32_t kTelemetryCounters = 1;
+constexpr int32_t kTelemetryEvents = 2;
+constexpr size_t kLatencyBuckets = 32;
+constexpr size_t kMaxPendingEvents = 1024;
+
+template <const char kModule[]> struct Telemetry {
+  static inline std::atomic<int32_t> mode = []() {
+    const char *env = std::getenv("TRITON_TVM_FFI_TELEMETRY");
+    if (env == nullptr || std::string_view(env) == "" ||
+        std::string_view(env) == "0") {
+      return kTelemetryOff;
+    } else if (std::string_view(env) == "events") {
+      return kTelemetryEvents;
+    } else {
+      return kTelemetryCounters;
+    }
+  }();
+
+  static inline int32_t Mode() { return mode.load(std::memory_order_relaxed); }
+};
+
+template <const char kModule[], const char kName[]> struct FallbackStats {
+  static inline std::atomic<uint64_t> count = 0;
+
+  static inline void Record() {
+    if (Telemetry<kModule>::Mode() != kTelemetryOff) {
+      count.fetch_add(1, std::memory_order_relaxed);
+    }
+  }
+};
+
+template <const char kModule[], const char kName[]> struct KernelStats {
+  static inline std::atomic<uint64_t> launches = 0;
+  static inline std::atomic<uint64_t> host_ns = 0;
+  static inline std::array<std::atomic<uint64_t>, kLatencyBuckets> histogram =
+      {};
+  static inline std::array<std::atomic<uint64_t>, kMaxDevices> devices = {};
+  static inline std::atomic<void *> stream = nullptr;
+  static inline std::mutex mutex;
+  static inline std::vector<std::pair<CUevent, CUevent>> pending;
+  static inline uint64_t gpu_ns = 0;
+  static inline uint64_t gpu_samples = 0;
+
+  static inline void Record(int32_t device, void *launched, uint64_t ns) {
+    size_t bucket = ns == 0 ? 0 : 63 - __builtin_clzll(ns);
+    launches.fetch_add(1, std::memory_order_relaxed);
+    host_ns.fetch_add(ns, std::memory_order_relaxed);
+    histogram[bucket < kLatencyBuckets ? bucket : kLatencyBuckets - 1]
+        .fetch_add(1, std::memory_order_relaxed);
+    if (device >= 0 && device < kMaxDevices) {
+      devices[device].fetch_add(1, std::memory_order_relaxed);
+    }
+    stream.store(launched, std::memory_order_relaxed);
+  }
+
+  static inline void Track(CUevent start, CUevent stop) {
+    std::lock_guard<std::mutex> lock(mutex);
+    pending.emplace_back(start, stop);
+    if (pending.size() >= kMaxPendingEvents) {
+      Drain();
+    }
+  }
+
+  static inline void Collect() {
+    std::lock_guard<std::mutex> lock(mutex);
+    Drain();
+  }
+
+  static inline void Drain() {
+    size_t kept = 0;
+    for (auto &[start, stop] : pending) {
+      CUresult status = cuEventQuery(stop);
+      if (status == CUDA_ERROR_NOT_READY) {
+        pending[kept++] = {start, stop};
+        continue;
+      }
+      float ms = 0.0f;
+      if (status == CUDA_SUCCESS &&
+          cuEventElapsedTime(&ms, start, stop) == CUDA_SUCCESS) {
+        gpu_ns += static_cast<uint64_t>(ms * 1e6);
+        ++gpu_samples;
+      }
+      cuEventDestroy(start);
+      cuEventDestroy(stop);
+    }
+    pending.resize(kept);
+  }
+
+  static inline tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> Read() {
+    Collect();
+    tvm::ffi::Array<int64_t> buckets;
+    for (const std::atomic<uint64_t> &count : histogram) {
+      buckets.push_back(count.load(std::memory_order_relaxed));
+    }
+    tvm::ffi::Map<int64_t, int64_t> per_device;
+    for (int32_t device = 0; device < kMaxDevices; ++device) {
+      if (uint64_t count = devices[device].load(std::memory_order_relaxed)) {
+        per_device.Set(device, count);
+      }
+    }
+    std::lock_guard<std::mutex> lock(mutex);
+    return {
+        {"launches", static_cast<int64_t>(
+                         launches.load(std::memory_order_relaxed))},
+        {"host_ns", static_cast<int64_t>(
+                        host_ns.load(std::memory_order_relaxed))},
+        {"histogram", buckets},
+        {"devices", per_device},
+        {"stream", reinterpret_cast<int64_t>(
+                       stream.load(std::memory_order_relaxed))},
+        {"gpu_ns", static_cast<int64_t>(gpu_ns)},
+        {"gpu_samples", static_cast<int64_t>(gpu_samples)},
+    };
+  }
+
+  static inline void Reset() {
+    Collect();
+    launches.store(0, std::memory_order_relaxed);
+    host_ns.store(0, std::memory_order_relaxed);
+    for (std::atomic<uint64_t> &count : histogram) {
+      count.store(0, std::memory_order_relaxed);
+    }
+    for (std::atomic<uint64_t> &count : devices) {
+      count.store(0, std::memory_order_relaxed);
+    }
+    stream.store(nullptr, std::memory_order_relaxed);
+    std::lock_guard<std::mutex> lock(mutex);
+    gpu_ns = 0;
+    gpu_samples = 0;
+  }
+};
+
+template <const char kModule[], const char kName[]> struct LaunchTimer {
+  int32_t mode;
+  int32_t device;
+  void *stream;
+  std::chrono::steady_clock::time_point begin = {};
+  CUevent start = nullptr;
+  CUevent stop = nullptr;
+
+  LaunchTimer(int32_t device, void *stream)
+      : mode(Telemetry<kModule>::Mode()), device(device), stream(stream) {
+    if (mode == kTelemetryOff) {
+      return;
+    }
+    begin = std::chrono::steady_clock::now();
+    if (mode == kTelemetryEvents) {
+      CUstreamCaptureStatus status = CU_STREAM_CAPTURE_STATUS_NONE;
+      __CUDA_CHECK(
+          cuStreamIsCapturing(reinterpret_cast<CUstream>(stream), &status));
+      if (status == CU_STREAM_CAPTURE_STATUS_NONE) {
+        __CUDA_CHECK(cuEventCreate(&start, CU_EVENT_DEFAULT));
+        __CUDA_CHECK(cuEventCreate(&stop, CU_EVENT_DEFAULT));
+        __CUDA_CHECK(cuEventRecord(start, reinterpret_cast<CUstream>(stream)));
+      }
+    }
+  }
+
+  LaunchTimer(const LaunchTimer &) = delete;
+  LaunchTimer &operator=(const LaunchTimer &) = delete;
+
+  ~LaunchTimer() {
+    if (start != nullptr) {
+      cuEventDestroy(start);
+      cuEventDestroy(stop);
+    }
+  }
+
+  void Stop() {
+    if (mode == kTelemetryOff) {
+      return;
+    }
+    if (start != nullptr) {
+      __CUDA_CHECK(cuEventRecord(stop, reinterpret_cast<CUstream>(stream)));
+      KernelStats<kModule, kName>::Track(std::exchange(start, nullptr),
+                                         std::exchange(stop, nullptr));
+    }
+    KernelStats<kModule, kName>::Record(
+        device, stream,
+        std::chrono::duration_cast<std::chrono::nanoseconds>(
+            std::chrono::steady_clock::now() - begin)
+            .count());
+  }
+};
+
+} // namespace triton_tvm_ffi
+
+#endif
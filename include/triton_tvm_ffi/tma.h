@@ -0,0 +1,180 @@
+#ifndef TRITON_TVM_FFI_TMA_H_
+#define TRITON_TVM_FFI_TMA_H_
+
+#include "macro.h"
+#include "types.h"
+#include <array>
+#include <cstdint>
+#include <cuda.h>
+#include <optional>
+#include <stdexcept>
+#include <string>
+#include <tvm/ffi/tvm_ffi.h>
+
+namespace triton_tvm_ffi {
+
+constexpr size_t kTensorMapCacheSize = 16;
+
+template <size_t kRank> struct TensorMapArgs {
+  CUtensorMap map;
+  std::array<int32_t, kRank> shape;
+  std::array<int64_t, kRank> strides;
+};
+
+template <size_t kRank> struct TensorDescArgs {
+  void *base;
+  std::array<int64_t, kRank> shape;
+  std::array<int64_t, kRank> strides;
+  int8_t padding;
+  int8_t tf32;
+  std::array<int32_t, kRank> shape32;
+  std::array<int64_t, kRank> strides64;
+};
+
+inline tvm::ffi::TensorView ToTensorView(const std::optional<tvm::ffi::Any> &val) {
+  return val->cast<tvm::ffi::TensorView>();
+}
+
+template <typename V> inline tvm::ffi::TensorView ToTensorView(const V &val) {
+  static_assert(kIsTensor<V>, "expected a tensor for a tensor descriptor");
+  return tvm::ffi::TensorView(val);
+}
+
+inline bool HasNDim(const std::optional<tvm::ffi::Any> &val, int32_t ndim) {
+  if (!val.has_value()) {
+    return false;
+  } else if (auto tensor = val->try_cast<tvm::ffi::TensorView>()) {
+    return tensor->ndim() == ndim;
+  } else {
+    return false;
+  }
+}
+
+template <typename V> inline bool HasNDim(const V &val, int32_t ndim) {
+  if constexpr (kIsTensor<V>) {
+    return val.ndim() == ndim;
+  } else {
+    return false;
+  }
+}
+
+template <size_t kRank>
+inline void CheckTensorDesc(const tvm::ffi::TensorView &tensor) {
+  if (tensor.ndim() != static_cast<int32_t>(kRank)) {
+    throw std::invalid_argument("tensor descriptor expects rank " +
+                                std::to_string(kRank) + ", got " +
+                                std::to_string(tensor.ndim()));
+  } else if (tensor.strides()[kRank - 1] != 1) {
+    throw std::invalid_argument(
+        "tensor descriptor expects a contiguous last dimension");
+  }
+}
+
+template <int32_t kElemType, int32_t kElemSize, int32_t kSwizzle,
+          bool kFp4Padded, bool kNanPadding, uint32_t... kBlock>
+struct TensorMapCache {
+  static constexpr size_t kRank = sizeof...(kBlock);
+
+  struct Entry {
+    void *base = nullptr;
+    std::array<int64_t, kRank> shape = {};
+    std::array<int64_t, kRank> strides = {};
+    TensorMapArgs<kRank> args;
+  };
+
+  static inline thread_local std::array<Entry, kTensorMapCacheSize> entries;
+  static inline thread_local size_t next = 0;
+
+  static inline TensorMapArgs<kRank> Get(const tvm::ffi::TensorView &tensor) {
+    CheckTensorDesc<kRank>(tensor);
+    void *base = tensor.data_ptr();
+    for (const Entry &entry : entries) {
+      if (entry.base == base && Matches(entry, tensor)) {
+        return entry.args;
+      }
+    }
+    Entry &entry = entries[next++ % kTensorMapCacheSize];
+    entry.base = base;
+    for (size_t i = 0; i < kRank; ++i) {
+      entry.shape[i] = tensor.shape()[i];
+      entry.strides[i] = tensor.strides()[i];
+      entry.args.shape[i] = static_cast<int32_t>(entry.shape[i]);
+      entry.args.strides[i] = entry.strides[i];
+    }
+    Encode(entry);
+    return entry.args;
+  }
+
+  static inline bool Matches(const Entry &entry,
+                             const tvm::ffi::TensorView &tensor) {
+    for (size_t i = 0; i < kRank; ++i) {
+      if (entry.shape[i] != tensor.shape()[i] ||
+          entry.strides[i] != tensor.strides()[i]) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  static inline void Encode(Entry &entry) {
+    constexpr uint32_t kBlockDims[] = {kBlock...};
+    cuuint32_t block[kRank], elementStrides[kRank];
+    cuuint64_t shape[kRank], strides[kRank];
+    for (size_t i = 0; i < kRank; ++i) {
+      block[kRank - i - 1] = kBlockDims[i];
+      shape[kRank - i - 1] = entry.shape[i];
+      elementStrides[i] = 1;
+    }
+    if constexpr (kFp4Padded) {
+      shape[0] *= 2;
+    }
+    for (size_t i = 0; i + 1 < kRank; ++i) {
+      strides[kRank - i - 2] = kElemSize * entry.strides[i];
+    }
+    strides[kRank - 1] =
+        shape[kRank - 1] * (kRank == 1 ? kElemSize : strides[kRank - 2]);
+    __CUDA_CHECK(cuTensorMapEncodeTiled(
+        &entry.args.map, static_cast<CUtensorMapDataType>(kElemType), kRank,
+        entry.base, shape, strides, block, elementStrides,
+        CU_TENSOR_MAP_INTERLEAVE_NONE,
+        static_cast<CUtensorMapSwizzle>(kSwizzle),
+        CU_TENSOR_MAP_L2_PROMOTION_L2_128B,
+        kNanPadding ? CU_TENSOR_MAP_FLOAT_OOB_FILL_NAN_REQUEST_ZERO_FMA
+                    : CU_TENSOR_MAP_FLOAT_OOB_FILL_NONE));
+    static const int32_t driver = []() {
+      int32_t version = 0;
+      __CUDA_CHECK(cuDriverGetVersion(&version));
+      return version;
+    }();
+    if (driver <= 13010) {
+      uint64_t index = 0;
+      for (size_t i = 0; i < kRank; ++i) {
+        index += (shape[i] - 1) * (i == 0 ? kElemSize : strides[i - 1]);
+      }
+      if (index + 1 < 128 * 1024) {
+        reinterpret_cast<uint64_t *>(&entry.args.map)[1] &= ~(1llu << 21);
+      }
+    }
+  }
+};
+
+template <size_t kRank, bool kNanPadding, bool kTf32>
+inline TensorDescArgs<kRank>
+DecomposeTensorDesc(const tvm::ffi::TensorView &tensor) {
+  CheckTensorDesc<kRank>(tensor);
+  TensorDescArgs<kRank> args;
+  args.base = tensor.data_ptr();
+  args.padding = kNanPadding;
+  args.tf32 = kTf32;
+  for (size_t i = 0; i < kRank; ++i) {
+    args.shape[i] = tensor.shape()[i];
+    args.strides[i] = tensor.strides()[i];
+    args.shape32[i] = static_cast<int32_t>(args.shape[i]);
+    args.strides64[i] = args.strides[i];
+  }
+  return args;
+}
+
+} // namespace triton_tvm_ffi
+
+#endif
@@ -0,0 +1,90 @@
+#ifndef TRITON_TVM_FFI_TYPES_H_
+#define TRITON_TVM_FFI_TYPES_H_
+
+#include <cmath>
+#include <cstdint>
+#include <cstring>
+#include <optional>
+#include <tvm/ffi/tvm_ffi.h>
+#include <type_traits>
+
+namespace triton_tvm_ffi {
+
+struct Float16 {
+  uint16_t bits;
+
+  explicit Float16(double value) {
+    float f = static_cast<float>(value);
+    uint32_t x;
+    std::memcpy(&x, &f, sizeof(x));
+    uint16_t sign = (x >> 16) & 0x8000;
+    uint32_t abs = x & 0x7fffffff;
+    if (abs >= 0x7f800000) {
+      bits = sign | 0x7c00 | (abs > 0x7f800000 ? 0x0200 : 0);
+    } else if (abs >= 0x477ff000) {
+      bits = sign | 0x7c00;
+    } else if (abs < 0x38800000) {
+      std::memcpy(&f, &abs, sizeof(f));
+      bits = sign | static_cast<uint16_t>(std::nearbyint(f * 16777216.0f));
+    } else {
+      uint32_t half = (abs >> 13) - (112 << 10), rest = abs & 0x1fff;
+      bits = sign | (half + (rest > 0x1000 || (rest == 0x1000 && (half & 1))));
+    }
+  }
+};
+
+struct BFloat16 {
+  uint16_t bits;
+
+  explicit BFloat16(double value) {
+    float f = static_cast<float>(value);
+    uint32_t x;
+    std::memcpy(&x, &f, sizeof(x));
+    if ((x & 0x7fffffff) > 0x7f800000) {
+      bits = (x >> 16) | 0x0040;
+    } else {
+      bits = (x + 0x7fff + ((x >> 16) & 1)) >> 16;
+    }
+  }
+};
+
+template <typename V>
+constexpr bool kIsTensor =
+    std::is_same_v<std::decay_t<V>, tvm::ffi::TensorView> ||
+    std::is_same_v<std::decay_t<V>, tvm::ffi::Tensor>;
+
+inline void *DataPtr(const std::optional<tvm::ffi::Any> &val) {
+  return val->cast<tvm::ffi::TensorView>().data_ptr();
+}
+
+template <typename V> inline void *DataPtr(const V &val) {
+  if constexpr (kIsTensor<V>) {
+    return val.data_ptr();
+  } else if constexpr (std::is_pointer_v<V>) {
+    return const_cast<void *>(reinterpret_cast<const void *>(val));
+  } else {
+    static_assert(std::is_integral_v<V>, "expected a tensor or a pointer");
+    return reinterpret_cast<void *>(static_cast<uintptr_t>(val));
+  }
+}
+
+template <typename T>
+inline T Cast(const std::optional<tvm::ffi::Any> &val) {
+  if constexpr (std::is_arithmetic_v<T>) {
+    return val->cast<T>();
+  } else {
+    return T(val->cast<double>());
+  }
+}
+
+template <typename T, typename V> inline T Cast(const V &val) {
+  if constexpr (std::is_arithmetic_v<T>) {
+    return static_cast<T>(val);
+  } else {
+    return T(static_cast<double>(val));
+  }
+}
+
+} // namespace triton_tvm_ffi
+
+#endif
@@ -1,5 +1,22 @@
+from .cache import cache_stats
+from .graph import graph
 from .jit import jit
+from .profile import build_stats, export_build_trace, profile_builds
+from .registry import drop_stale_modules, module_stats
 from .utils import include_paths
-from .wrap import torch_wrap, wrap
+from .wrap import build_all, torch_wrap, wrap
 
-__all__ = ["include_paths", "jit", "torch_wrap", "wrap"]
+__all__ = [
+    "build_all",
+    "build_stats",
+    "cache_stats",
+    "drop_stale_modules",
+    "export_build_trace",
+    "graph",
+    "include_paths",
+    "jit",
+    "module_stats",
+    "profile_builds",
+    "torch_wrap",
+    "wrap",
+]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Final, List, Optional, Union
+
+CACHE_VERSION: Final[int] = 6
+
+
+class TVMFFICaptureCache(object):
+    def __init__(self, path: Optional[Union[str, Path]] = None, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.path: Final[Path] = Path(
+            path
+            or os.environ.get(
+                "TRITON_TVM_FFI_CACHE_DIR", Path.home() / ".cache" / "triton-tvm-ffi"
+            )
+        ).expanduser()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: Final[threading.Lock] = threading.Lock()
+
+    def load(self, key: str) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = []
+        metas: List[Path] = (
+            sorted((self.path / key).glob("*.json"), key=lambda p: p.stat().st_mtime)
+            if (self.path / key).is_dir()
+            else []
+        )
+        for meta in metas:
+            cubin: Path = meta.with_suffix(".cubin")
+            try:
+                with open(meta, "r") as f:
+                    entry: Dict[str, Any] = json.load(f)
+                entry["kernel"] = cubin.read_bytes()
+            except (OSError, ValueError):
+                continue
+            entries.append(entry)
+        with self.lock:
+            if entries:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entries
+
+    def store(self, key: str, spec: str, entry: Dict[str, Any]) -> None:
+        directory: Path = self.path / key
+        directory.mkdir(parents=True, exist_ok=True)
+        meta: Dict[str, Any] = {k: v for k, v in entry.items() if k != "kernel"}
+        self._write(directory / f"{spec}.cubin", entry["kernel"])
+        self._write(directory / f"{spec}.json", json.dumps(meta).encode("utf-8"))
+
+    def load_tunings(self, key: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path / f"{key}.tunings.json", "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def store_tunings(self, key: str, tunings: Dict[str, Dict[str, Any]]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._write(
+            self.path / f"{key}.tunings.json", json.dumps(tunings).encode("utf-8")
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        tmp: Path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+capture_cache: Final[TVMFFICaptureCache] = TVMFFICaptureCache()
+
+
+def cache_stats() -> Dict[str, int]:
+    return capture_cache.stats()
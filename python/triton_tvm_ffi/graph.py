@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import ctypes
+from functools import cached_property
+from typing import Any, Callable, Final, Iterator, List, Optional, Sequence
+
+import torch
+import tvm_ffi
+
+from .wrap import TVMFFIWrapperFunction
+
+GRAPH_IDLE: Final[int] = 0
+GRAPH_CAPTURE: Final[int] = 1
+GRAPH_PATCH: Final[int] = 2
+
+
+class TVMFFIGraph(object):
+    def __init__(
+        self,
+        fn: Callable[..., Any],
+        wrappers: Optional[Sequence[TVMFFIWrapperFunction]] = None,
+        device: Optional[int] = None,
+        *args,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.fn: Final[Callable[..., Any]] = fn
+        self.wrappers: Final[List[TVMFFIWrapperFunction]] = [
+            *(wrappers if wrappers is not None else [fn])
+        ]
+        if not self.wrappers:
+            raise ValueError("a graph needs at least one wrapper to capture")
+        self.device: Final[int] = (
+            device if device is not None else torch.cuda.current_device()
+        )
+        self.graph: Optional[ctypes.c_void_p] = None
+        self.ready: bool = False
+        self.modules: List[Optional[str]] = []
+        self.launch: Optional[tvm_ffi.Function] = None
+        self.outputs: Any = None
+
+    def __call__(self, *args, **kwargs) -> Any:
+        if not self.ready or ((args or kwargs) and not self.patch(*args, **kwargs)):
+            self.capture(*args, **kwargs)
+        return self.replay()
+
+    def __del__(self) -> None:
+        if self.graph is not None and self.modules:
+            self.runtime("destroy")(self.graph)
+
+    @cached_property
+    def stream(self) -> torch.cuda.Stream:
+        return torch.cuda.Stream(self.device)
+
+    @cached_property
+    def pool(self) -> torch.cuda.MemPool:
+        return torch.cuda.MemPool()
+
+    @property
+    def stale(self) -> bool:
+        return self.modules != [
+            wrapper.registry.module(wrapper) for wrapper in self.wrappers
+        ]
+
+    def runtime(self, name: str) -> tvm_ffi.Function:
+        if not self.modules:
+            raise RuntimeError("the graph has not been captured yet")
+        return tvm_ffi.get_global_func(f"{self.modules[0]}.graph_{name}")
+
+    @contextmanager
+    def record(self, mode: int) -> Iterator[None]:
+        modules: List[str] = [*dict.fromkeys(filter(None, self.modules))]
+        for module in modules:
+            tvm_ffi.get_global_func(f"{module}.graph_record")(self.graph, mode)
+        try:
+            with torch.cuda.stream(self.stream), torch.cuda.use_mem_pool(
+                self.pool, self.device
+            ), tvm_ffi.use_raw_stream(
+                tvm_ffi.device("cuda", self.device), self.stream.cuda_stream
+            ):
+                yield
+        finally:
+            for module in modules:
+                tvm_ffi.get_global_func(f"{module}.graph_record")(None, GRAPH_IDLE)
+
+    def capture(self, *args, **kwargs) -> Any:
+        for wrapper in self.wrappers:
+            wrapper.preload()
+        self.ready = False
+        self.modules = [
+            wrapper.registry.module(wrapper) for wrapper in self.wrappers
+        ]
+        stream: ctypes.c_void_p = ctypes.c_void_p(self.stream.cuda_stream)
+        self.stream.wait_stream(torch.cuda.current_stream(self.device))
+        self.graph = self.runtime("begin")(stream, self.graph)
+        try:
+            with self.record(GRAPH_CAPTURE):
+                outputs: Any = self.fn(*args, **kwargs)
+        except BaseException:
+            self.runtime("end")(stream, self.graph, False)
+            raise
+        self.runtime("end")(stream, self.graph, True)
+        self.launch = self.runtime("launch")
+        self.outputs = outputs
+        self.ready = True
+        return outputs
+
+    def patch(self, *args, **kwargs) -> bool:
+        if self.graph is None or self.stale or not self.runtime("patch")(self.graph):
+            return False
+        self.ready = False
+        self.stream.wait_stream(torch.cuda.current_stream(self.device))
+        with self.record(GRAPH_PATCH):
+            outputs: Any = self.fn(*args, **kwargs)
+        if not self.runtime("patched")(self.graph):
+            return False
+        self.outputs = outputs
+        self.ready = True
+        return True
+
+    def replay(self, stream: Optional[int] = None) -> Any:
+        if not self.ready:
+            raise RuntimeError("the graph has not been captured yet")
+        if self.stale:
+            raise RuntimeError(
+                "a wrapper was rebuilt since the graph was captured, capture it again"
+            )
+        self.launch(
+            self.graph,
+            ctypes.c_void_p(
+                stream
+                if stream is not None
+                else torch.cuda.current_stream(self.device).cuda_stream
+            ),
+        )
+        return self.outputs
+
+
+def graph(
+    fn: Callable[..., Any],
+    wrappers: Optional[Sequence[TVMFFIWrapperFunction]] = None,
+    device: Optional[int] = None,
+) -> TVMFFIGraph:
+    return TVMFFIGraph(fn, wrappers, device)
@@ -7,35 +7,63 @@ from typing import (
     Callable,
     Dict,
     Final,
-    Iterator,
     List,
     Mapping,
     Optional,
     Sequence,
+    Set,
     Tuple,
     Union,
 )
+import weakref
 
 import torch
-from triton.compiler import CompiledKernel
-from triton.runtime import Autotuner, JITFunction
+import triton
+from triton.backends.compiler import GPUTarget
+from triton.compiler import ASTSource, CompiledKernel
+from triton.runtime import Autotuner, JITFunction, driver
+from triton.tools.tensor_descriptor import TensorDescriptor
 import tvm_ffi
 
-from .utils import type_canonicalize
+from .cache import CACHE_VERSION, TVMFFICaptureCache, capture_cache
+from .kernel import TVMFFIKernel
+from .profile import build_profiler
+from .utils import TORCH_TYPES, stable_hash, target_entry, type_dlpack
+
+registered_fns: Final[weakref.WeakValueDictionary] = weakref.WeakValueDictionary()
 
 
 class TVMFFIJITFunction(object):
-    def __init__(self, fn: Union[Autotuner, JITFunction], *args, **kwargs) -> None:
+    def __init__(
+        self,
+        fn: Union[Autotuner, JITFunction],
+        cache: Optional[TVMFFICaptureCache] = capture_cache,
+        descriptors: Optional[
+            Mapping[str, Optional[Union[Sequence[int], Mapping[str, Any]]]]
+        ] = None,
+        *args,
+        **kwargs,
+    ) -> None:
         super().__init__(*args, **kwargs)
         self.fn: Final[Union[Autotuner, JITFunction]] = fn
+        self.cache: Final[Optional[TVMFFICaptureCache]] = cache
+        self.descriptors: Final[Dict[str, Dict[str, Any]]] = {
+            name: self.descriptor_options(value)
+            for name, value in (descriptors or {}).items()
+        }
         self.signature: List[str] = [*inspect.signature(self.basefn).parameters.keys()]
-        self.best_config: Optional[Dict[str, Any]] = None
-        self.ctypes: Optional[List[Optional[str]]] = None
-        self.kernel: Optional[bytes] = None
-        self.num_warps: Optional[int] = None
-        self.shmem: int = 0
+        self.kernels: Dict[str, TVMFFIKernel] = {}
+        self.tunings: Dict[str, Dict[str, Any]] = {}
+        self.target: Optional[GPUTarget] = None
+        self.restored: Set[GPUTarget] = set()
+        self.wrappers: Final[weakref.WeakSet] = weakref.WeakSet()
+        if registered_fns.setdefault(self.fullname, self.jitfn) is not self.jitfn:
+            raise RuntimeError(
+                f"{self.fullname} is already registered by another function with "
+                f"the same module, qualname and source"
+            )
 
-        @tvm_ffi.register_global_func(self.fullname)
+        @tvm_ffi.register_global_func(self.fullname, override=True)
         def _(
             grid: Union[
                 Callable[[Dict[str, Any]], Tuple[int, int, int]], Tuple[int, int, int]
@@ -45,16 +73,21 @@ class TVMFFIJITFunction(object):
             args: Sequence[Any],
             kwargs: Mapping[str, Any],
         ):
-            args: Iterator[Any] = map(self.canonicalize, args)
+            args: List[Any] = [
+                self.describe(name, self.canonicalize(v))
+                for name, v in zip(self.signature, args)
+            ]
             kwargs: Dict[str, Any] = {
-                k: self.canonicalize(v) for k, v in kwargs.items()
+                k: self.describe(k, self.canonicalize(v)) for k, v in kwargs.items()
             }
-            kernel: CompiledKernel = self.fn[grid](*args, **kwargs)
-            self.num_warps, _, self.shmem = kernel.packed_metadata
-            self.ctypes = [type_canonicalize(v) for v in kernel.src.signature.values()]
-            self.kernel = kernel.kernel
+            with build_profiler.span("launch", "capture", fn=self.fnname):
+                kernel: CompiledKernel = self.fn[grid](*args, **kwargs)
             if isinstance(self.fn, Autotuner):
-                self.best_config = self.fn.best_config.all_kwargs()
+                self.capture(kernel, self.fn.best_config.all_kwargs())
+                with build_profiler.span("tune", "capture", fn=self.fnname):
+                    self.tune(kernel, grid, args, kwargs)
+            else:
+                self.capture(kernel)
             return kernel
 
     def __getitem__(
@@ -70,12 +103,39 @@ class TVMFFIJITFunction(object):
         return self.jitfn.fn
 
     @property
-    def cache_hash(self) -> int:
-        return self.ctypes_hash ^ self.kernel_hash
+    def cache_hash(self) -> str:
+        return stable_hash(*sorted(spec.hash for spec in self.specializations))
 
     @property
-    def ctypes_hash(self) -> int:
-        return hash(tuple(self.ctypes) if self.ctypes is not None else None)
+    def autotune_table(self) -> List[Tuple[List[str], int]]:
+        configs: List[Dict[str, Any]] = self.configs
+        return [
+            (
+                [
+                    f"triton_tvm_ffi::Equals(__arg{self.signature.index(k)}, {TVMFFIKernel.literal(v)}, false)"
+                    for k, v in tuning["key"].items()
+                ]
+                + [
+                    f"triton_tvm_ffi::HasDType(__arg{self.signature.index(k)}, {dtype[0]}, {dtype[1]})"
+                    for k, v in tuning["dtypes"].items()
+                    if (dtype := type_dlpack(TORCH_TYPES.get(v, ""))) is not None
+                ],
+                configs.index(tuning["config"]),
+            )
+            for _, tuning in sorted(self.active_tunings.items())
+        ]
+
+    @property
+    def configs(self) -> List[Dict[str, Any]]:
+        configs: List[Dict[str, Any]] = []
+        for tuning in self.active_tunings.values():
+            if tuning["config"] not in configs:
+                configs.append(tuning["config"])
+        return configs
+
+    @property
+    def active_tunings(self) -> Dict[str, Dict[str, Any]]:
+        return self.tunings_for(self.target)
 
     @cached_property
     def fnname(self) -> str:
@@ -92,20 +152,243 @@ class TVMFFIJITFunction(object):
             fn = fn.fn
         return fn
 
-    @property
-    def kernel_hash(self) -> int:
-        return hash(self.kernel)
-
-    @property
-    def kernel_cstr(self) -> Optional[str]:
-        if self.kernel is not None:
-            return "".join(f"\\x{byte:02x}" for byte in self.kernel)
-        else:
-            return None
+    @cached_property
+    def launch_params(self) -> List[Tuple[int, str]]:
+        tuned: List[str] = (
+            [k for config in self.fn.configs for k in config.kwargs]
+            if isinstance(self.fn, Autotuner)
+            else []
+        )
+        return [
+            (i, name) for i, name in enumerate(self.signature) if name not in tuned
+        ]
 
     @cached_property
     def name(self) -> str:
-        return f"{self.fnname}_{hash(self.basefn)}"
+        return f"{self.fnname}_{stable_hash(self.basefn.__module__, self.basefn.__qualname__, self.jitfn.src)}"
+
+    @cached_property
+    def params(self) -> List[inspect.Parameter]:
+        return [*inspect.signature(self.basefn).parameters.values()]
+
+    @property
+    def specializations(self) -> List[TVMFFIKernel]:
+        return sorted(
+            (
+                kernel
+                for kernel in self.kernels.values()
+                if (
+                    self.target is None
+                    or kernel.target in (None, target_entry(self.target))
+                )
+                and (not self.active_tunings or kernel.best_config in self.configs)
+            ),
+            key=lambda kernel: (-len(kernel.guards), kernel.hash),
+        )
+
+    def capture(
+        self, kernel: CompiledKernel, best_config: Optional[Dict[str, Any]] = None
+    ) -> TVMFFIKernel:
+        with build_profiler.span(
+            "capture", "capture", fn=self.fnname, cubin_bytes=len(kernel.kernel)
+        ):
+            spec: TVMFFIKernel = TVMFFIKernel.from_compiled(
+                kernel, self.params, best_config, self.descriptors
+            )
+            if spec.native and spec.hash not in self.kernels:
+                self.kernels[spec.hash] = spec
+                self.invalidate()
+                if self.cache is not None:
+                    self.cache.store(
+                        self.capture_key(kernel.metadata.target), spec.hash, spec.entry
+                    )
+        return spec
+
+    def invalidate(self) -> None:
+        for wrapper in self.wrappers:
+            wrapper.invalidate()
+
+    def precompile(
+        self,
+        signature: Mapping[str, str],
+        constexprs: Optional[Mapping[str, Any]] = None,
+        target: Optional[GPUTarget] = None,
+        config: Optional[triton.Config] = None,
+        divisibility: Sequence[str] = (),
+        key: Optional[Mapping[str, Any]] = None,
+        **options,
+    ) -> TVMFFIKernel:
+        constexprs: Dict[str, Any] = {
+            **(constexprs or {}),
+            **(config.kwargs if config is not None else {}),
+        }
+        options: Dict[str, Any] = {
+            **{
+                k: v
+                for k, v in (config.all_kwargs() if config is not None else {}).items()
+                if k not in config.kwargs
+            },
+            **options,
+        }
+        src: ASTSource = ASTSource(
+            self.jitfn,
+            {
+                name: "constexpr" if name in constexprs else signature[name]
+                for name in self.signature
+            },
+            constexprs,
+            {
+                (self.signature.index(name),): [["tt.divisibility", 16]]
+                for name in divisibility
+            },
+        )
+        with build_profiler.span("precompile", "capture", fn=self.fnname):
+            kernel: CompiledKernel = triton.compile(
+                src, target=target or driver.active.get_current_target(), options=options
+            )
+        target: GPUTarget = kernel.metadata.target
+        best_config: Optional[Dict[str, Any]] = (
+            config.all_kwargs() if config is not None else None
+        )
+        if key is not None and best_config is not None:
+            tuning: Dict[str, Any] = {
+                "config": best_config,
+                "target": target_entry(target),
+                "dtypes": {
+                    name: dtype
+                    for name, ty in signature.items()
+                    if ty.startswith("*")
+                    for dtype, v in TORCH_TYPES.items()
+                    if v == ty[1:]
+                },
+                "key": {**key},
+            }
+            if (
+                digest := stable_hash(tuning["target"], tuning["dtypes"], tuning["key"])
+            ) not in self.tunings:
+                self.tunings[digest] = tuning
+                self.invalidate()
+            if self.cache is not None:
+                self.cache.store_tunings(
+                    self.capture_key(target), self.tunings_for(target)
+                )
+        return self.capture(kernel, best_config)
+
+    def tune(
+        self,
+        kernel: CompiledKernel,
+        grid: Union[
+            Callable[[Dict[str, Any]], Tuple[int, int, int]], Tuple[int, int, int]
+        ],
+        args: Sequence[Any],
+        kwargs: Mapping[str, Any],
+    ) -> None:
+        nargs: Dict[str, Any] = {
+            k: v
+            for k, v in {**dict(zip(self.fn.arg_names, args)), **kwargs}.items()
+            if k in self.fn.arg_names
+        }
+        keys: List[str] = [key for key in self.fn.keys if key in nargs]
+        tensors: List[str] = [k for k, v in nargs.items() if hasattr(v, "dtype")]
+        dtypes: Tuple[str, ...] = tuple(str(nargs[k].dtype) for k in tensors)
+        target: GPUTarget = kernel.metadata.target
+        for key, config in self.fn.cache.items():
+            if len(key) != len(keys) + len(tensors):
+                continue
+            tuning: Dict[str, Any] = {
+                "config": config.all_kwargs(),
+                "target": target_entry(target),
+                "dtypes": dict(zip(tensors, key[len(keys) :])),
+                "key": dict(zip(keys, key[: len(keys)])),
+            }
+            if (
+                digest := stable_hash(tuning["target"], tuning["dtypes"], tuning["key"])
+            ) not in self.tunings:
+                self.tunings[digest] = tuning
+                self.invalidate()
+            if key[len(keys) :] == dtypes and not any(
+                spec.best_config == tuning["config"]
+                and spec.target in (None, tuning["target"])
+                for spec in self.kernels.values()
+            ):
+                if config.pre_hook is not None:
+                    config.pre_hook(
+                        {
+                            **dict(zip(self.fn.arg_names, args)),
+                            **kwargs,
+                            **tuning["config"],
+                        }
+                    )
+                self.capture(
+                    self.fn.fn.run(
+                        *args, grid=grid, warmup=True, **kwargs, **tuning["config"]
+                    ),
+                    tuning["config"],
+                )
+        if self.cache is not None:
+            self.cache.store_tunings(self.capture_key(target), self.tunings_for(target))
+
+    def capture_key(self, target: GPUTarget) -> str:
+        return stable_hash(
+            CACHE_VERSION,
+            self.jitfn.cache_key,
+            triton.__version__,
+            target.backend,
+            target.arch,
+            target.warp_size,
+        )
+
+    def tunings_for(self, target: Optional[GPUTarget]) -> Dict[str, Dict[str, Any]]:
+        return {
+            digest: tuning
+            for digest, tuning in self.tunings.items()
+            if target is None or tuning.get("target") in (None, target_entry(target))
+        }
+
+    def restore(self, target: Optional[GPUTarget] = None) -> bool:
+        target: GPUTarget = target or driver.active.get_current_target()
+        self.target = target
+        if target not in self.restored and self.cache is not None:
+            self.restored.add(target)
+            with build_profiler.span("restore", "capture", fn=self.fnname):
+                for entry in self.cache.load(self.capture_key(target)):
+                    if (spec := TVMFFIKernel.from_entry(entry)).native:
+                        self.kernels.setdefault(spec.hash, spec)
+                self.tunings.update(self.cache.load_tunings(self.capture_key(target)))
+            self.invalidate()
+        return bool(self.specializations)
+
+    def describe(self, name: str, val: Any) -> Any:
+        if name not in self.descriptors or not isinstance(val, torch.Tensor):
+            return val
+        options: Dict[str, Any] = self.descriptors[name]
+        return TensorDescriptor.from_tensor(
+            val,
+            (
+                [*options["block_shape"]]
+                if options["block_shape"] is not None
+                else [1] * val.dim()
+            ),
+            options["padding"],
+            options["round_f32_to_tf32"],
+        )
+
+    @staticmethod
+    def descriptor_options(
+        value: Optional[Union[Sequence[int], Mapping[str, Any]]],
+    ) -> Dict[str, Any]:
+        options: Dict[str, Any] = {
+            "block_shape": None,
+            "padding": "zero",
+            "round_f32_to_tf32": False,
+            **(value if isinstance(value, Mapping) else {"block_shape": value}),
+        }
+        if options["padding"] not in ("zero", "nan"):
+            raise ValueError(
+                "descriptor padding must be 'zero' or 'nan', "
+                f"got {options['padding']!r}"
+            )
+        return options
 
     @staticmethod
     def canonicalize(val: Any) -> Any:
@@ -115,5 +398,12 @@ class TVMFFIJITFunction(object):
             return val
 
 
-def jit(fn: JITFunction) -> TVMFFIJITFunction:
-    return TVMFFIJITFunction(fn)
+def jit(
+    fn: Optional[Union[Autotuner, JITFunction]] = None,
+    descriptors: Optional[
+        Mapping[str, Optional[Union[Sequence[int], Mapping[str, Any]]]]
+    ] = None,
+) -> Union[TVMFFIJITFunction, Callable[..., TVMFFIJITFunction]]:
+    if fn is None:
+        return lambda fn: TVMFFIJITFunction(fn, descriptors=descriptors)
+    return TVMFFIJITFunction(fn, descriptors=descriptors)
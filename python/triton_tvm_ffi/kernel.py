@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import inspect
+import json
+import math
+from typing import Any, Dict, Final, List, Mapping, Optional, Sequence, Tuple
+
+from triton.backends.nvidia.driver import TMA_DTYPE_DEVICE_TO_HOST, TMA_TF32
+from triton.compiler import CompiledKernel
+
+from .utils import target_entry, type_canonicalize, type_descriptor, type_dlpack
+
+
+class TVMFFIKernel(object):
+    def __init__(
+        self,
+        hash: str,
+        kernel: bytes,
+        ctypes: List[Optional[str]],
+        num_warps: int,
+        shmem: int,
+        best_config: Optional[Dict[str, Any]] = None,
+        guards: Optional[List[str]] = None,
+        constants: Optional[Dict[str, Any]] = None,
+        cluster_dims: Optional[Sequence[int]] = None,
+        cooperative: bool = False,
+        pdl: bool = False,
+        descriptors: Optional[Dict[str, Dict[str, Any]]] = None,
+        global_scratch: Optional[Sequence[int]] = None,
+        profile_scratch: Optional[Sequence[int]] = None,
+        target: Optional[Sequence[Any]] = None,
+        *args,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.hash: Final[str] = hash
+        self.kernel: Final[bytes] = kernel
+        self.ctypes: Final[List[Optional[str]]] = ctypes
+        self.num_warps: Final[int] = num_warps
+        self.shmem: Final[int] = shmem
+        self.best_config: Final[Optional[Dict[str, Any]]] = best_config
+        self.guards: Final[List[str]] = guards or []
+        self.constants: Final[Dict[str, Any]] = constants or {}
+        self.cluster_dims: Final[List[int]] = [*(cluster_dims or (1, 1, 1))]
+        self.cooperative: Final[bool] = cooperative
+        self.pdl: Final[bool] = pdl
+        self.descriptors: Final[Dict[str, Dict[str, Any]]] = descriptors or {}
+        self.global_scratch: Final[List[int]] = [*(global_scratch or (0, 1))]
+        self.profile_scratch: Final[List[int]] = [*(profile_scratch or (0, 1))]
+        self.target: Final[Optional[List[Any]]] = (
+            [*target] if target is not None else None
+        )
+
+    @property
+    def entry(self) -> Dict[str, Any]:
+        return {
+            "best_config": self.best_config,
+            "cluster_dims": self.cluster_dims,
+            "constants": self.constants,
+            "cooperative": self.cooperative,
+            "ctypes": self.ctypes,
+            "descriptors": self.descriptors,
+            "global_scratch": self.global_scratch,
+            "guards": self.guards,
+            "hash": self.hash,
+            "kernel": self.kernel,
+            "num_warps": self.num_warps,
+            "pdl": self.pdl,
+            "profile_scratch": self.profile_scratch,
+            "shmem": self.shmem,
+            "target": self.target,
+        }
+
+    @property
+    def native(self) -> bool:
+        return "false" not in self.guards and all(
+            ctype != "CUtensorMap" or f"{i}" in self.descriptors
+            for i, ctype in enumerate(self.ctypes)
+        )
+
+    @property
+    def meta(self) -> Dict[str, str]:
+        return {
+            k: value
+            for k, v in {**self.constants, **(self.best_config or {})}.items()
+            if (value := self.literal(v)) is not None
+        }
+
+    @classmethod
+    def from_compiled(
+        cls,
+        kernel: CompiledKernel,
+        params: Sequence[inspect.Parameter],
+        best_config: Optional[Dict[str, Any]] = None,
+        descriptors: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ) -> TVMFFIKernel:
+        num_warps, num_ctas, shmem = kernel.packed_metadata
+        return cls(
+            kernel.hash,
+            kernel.kernel,
+            [type_canonicalize(v) for v in kernel.src.signature.values()],
+            num_warps,
+            shmem,
+            best_config,
+            cls.make_guards(
+                params,
+                [*kernel.src.signature.values()],
+                kernel.src.constants,
+                kernel.src.attrs,
+                best_config or {},
+            ),
+            {
+                param.name: kernel.src.constants[(i,)]
+                for i, (param, ty) in enumerate(zip(params, kernel.src.signature.values()))
+                if ty == "constexpr"
+                and cls.literal(kernel.src.constants.get((i,))) is not None
+            },
+            getattr(kernel.metadata, "cluster_dims", None) or (num_ctas, 1, 1),
+            getattr(kernel.metadata, "launch_cooperative_grid", False),
+            getattr(kernel.metadata, "launch_pdl", False),
+            cls.make_descriptors(
+                [*kernel.src.signature.values()],
+                getattr(kernel.metadata, "tensordesc_meta", None) or [],
+                [(descriptors or {}).get(param.name, {}) for param in params],
+            ),
+            (
+                getattr(kernel.metadata, "global_scratch_size", 0),
+                getattr(kernel.metadata, "global_scratch_align", 1),
+            ),
+            (
+                getattr(kernel.metadata, "profile_scratch_size", 0),
+                getattr(kernel.metadata, "profile_scratch_align", 1),
+            ),
+            target_entry(kernel.metadata.target),
+        )
+
+    @classmethod
+    def from_entry(cls, entry: Mapping[str, Any]) -> TVMFFIKernel:
+        return cls(
+            entry["hash"],
+            entry["kernel"],
+            entry["ctypes"],
+            entry["num_warps"],
+            entry["shmem"],
+            entry["best_config"],
+            entry["guards"],
+            entry.get("constants"),
+            entry.get("cluster_dims"),
+            entry.get("cooperative", False),
+            entry.get("pdl", False),
+            entry.get("descriptors"),
+            entry.get("global_scratch"),
+            entry.get("profile_scratch"),
+            entry.get("target"),
+        )
+
+    def descriptor(self, index: int) -> Optional[Dict[str, Any]]:
+        return self.descriptors.get(f"{index}")
+
+    @staticmethod
+    def make_descriptors(
+        types: Sequence[str],
+        metas: Sequence[Mapping[str, Any]],
+        options: Sequence[Mapping[str, Any]] = (),
+    ) -> Dict[str, Dict[str, Any]]:
+        descriptors: Dict[str, Dict[str, Any]] = {}
+        ordinals: List[int] = [
+            i for i, ty in enumerate(types) if ty.startswith("tensordesc")
+        ]
+        for ordinal, i in enumerate(ordinals):
+            if (descriptor := type_descriptor(types[i])) is None:
+                continue
+            dtype, block_shape = descriptor
+            option: Mapping[str, Any] = options[i] if i < len(options) else {}
+            padding: bool = option.get("padding", "zero") == "nan"
+            tf32: bool = bool(option.get("round_f32_to_tf32", False))
+            if ordinal < len(metas):
+                meta: Mapping[str, Any] = metas[ordinal]
+                descriptors[f"{i}"] = {
+                    "block_shape": [*meta["block_size"]],
+                    "dtype": dtype,
+                    "elem_size": meta["elem_size"],
+                    "elem_type": TMA_DTYPE_DEVICE_TO_HOST[
+                        TMA_TF32 if tf32 else meta["elem_type"]
+                    ],
+                    "fp4_padded": bool(meta["fp4_padded"]),
+                    "padding": padding,
+                    "rank": len(meta["block_size"]),
+                    "swizzle": meta["swizzle"],
+                    "tf32": tf32,
+                }
+            else:
+                descriptors[f"{i}"] = {
+                    "dtype": dtype,
+                    "padding": padding,
+                    "rank": len(block_shape),
+                    "tf32": tf32,
+                }
+        return descriptors
+
+    @staticmethod
+    def make_guards(
+        params: Sequence[inspect.Parameter],
+        types: Sequence[str],
+        constants: Mapping[Tuple[int, ...], Any],
+        attrs: Mapping[Tuple[int, ...], List[List[Any]]],
+        best_config: Mapping[str, Any],
+    ) -> List[str]:
+        guards: List[str] = []
+        for i, (param, ty) in enumerate(zip(params, types)):
+            if param.name in best_config:
+                continue
+            elif ty == "constexpr":
+                if (i,) not in constants:
+                    continue
+                fallback: bool = (
+                    param.default is not inspect.Parameter.empty
+                    and param.default == constants[(i,)]
+                )
+                if constants[(i,)] is None:
+                    guards.append(
+                        f"triton_tvm_ffi::IsNone(__arg{i}, {'true' if fallback else 'false'})"
+                    )
+                elif (value := TVMFFIKernel.literal(constants[(i,)])) is not None:
+                    guards.append(
+                        f"triton_tvm_ffi::Equals(__arg{i}, {value}, {'true' if fallback else 'false'})"
+                    )
+                else:
+                    guards.append("false")
+                continue
+            elif ty.startswith("*"):
+                if (dtype := type_dlpack(ty[1:])) is not None:
+                    guards.append(
+                        f"triton_tvm_ffi::HasDType(__arg{i}, {dtype[0]}, {dtype[1]})"
+                    )
+            elif ty == "i32":
+                guards.append(f"triton_tvm_ffi::FitsInt32(__arg{i})")
+            elif (descriptor := type_descriptor(ty)) is not None:
+                if (dtype := type_dlpack(descriptor[0])) is not None:
+                    guards.append(
+                        f"triton_tvm_ffi::HasDType(__arg{i}, {dtype[0]}, {dtype[1]})"
+                    )
+                guards.append(
+                    f"triton_tvm_ffi::HasNDim(__arg{i}, {len(descriptor[1])})"
+                )
+                guards.append(f"triton_tvm_ffi::IsAligned(__arg{i}, 16)")
+            for attr, value in attrs.get((i,), []):
+                if attr == "tt.divisibility":
+                    guards.append(f"triton_tvm_ffi::IsAligned(__arg{i}, {value})")
+        return guards
+
+    @staticmethod
+    def literal(value: Any) -> Optional[str]:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        elif isinstance(value, int):
+            return f"int64_t({value})"
+        elif isinstance(value, float) and math.isfinite(value):
+            return f"double({value!r})"
+        elif isinstance(value, str):
+            return json.dumps(value)
+        else:
+            return None
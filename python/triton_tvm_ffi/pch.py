@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from functools import cached_property
+import os
+from pathlib import Path
+import subprocess
+import threading
+from typing import Final, List, Optional, Sequence, Union
+import warnings
+
+import torch
+import tvm_ffi
+from tvm_ffi.libinfo import find_dlpack_include_path, find_include_path
+from tvm_ffi.utils import FileLock
+
+from .utils import stable_hash
+
+TORCH_HEADERS: Final[List[str]] = [
+    "ATen/DLConvertor.h",
+    "ATen/core/ATen_fwd.h",
+    "ATen/dlpack.h",
+    "ATen/ops/empty.h",
+    "cuda.h",
+    "optional",
+    "tvm/ffi/container/tensor.h",
+    "tvm/ffi/extra/cuda/cubin_launcher.h",
+    "tvm/ffi/function.h",
+    "tvm/ffi/tvm_ffi.h",
+    "triton_tvm_ffi/graph.h",
+    "triton_tvm_ffi/grid.h",
+    "triton_tvm_ffi/guard.h",
+    "triton_tvm_ffi/kernel.h",
+    "triton_tvm_ffi/launch.h",
+    "triton_tvm_ffi/macro.h",
+    "triton_tvm_ffi/meta.h",
+    "triton_tvm_ffi/scratch.h",
+    "triton_tvm_ffi/telemetry.h",
+    "triton_tvm_ffi/tma.h",
+    "triton_tvm_ffi/types.h",
+]
+
+
+class TVMFFIPrecompiledHeader(object):
+    def __init__(
+        self,
+        headers: Sequence[str],
+        extra_cflags: Optional[Sequence[str]] = None,
+        extra_include_paths: Optional[Sequence[Union[str, Path]]] = None,
+        path: Optional[Union[str, Path]] = None,
+        *args,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.headers: Final[List[str]] = [*headers]
+        self.extra_cflags: Final[List[str]] = [*(extra_cflags or [])]
+        self.extra_include_paths: Final[List[str]] = [
+            str(Path(path).resolve()) for path in extra_include_paths or []
+        ]
+        self.root: Final[Path] = Path(
+            path
+            or os.environ.get(
+                "TRITON_TVM_FFI_CACHE_DIR", Path.home() / ".cache" / "triton-tvm-ffi"
+            )
+        ).expanduser()
+        self.lock: Final[threading.Lock] = threading.Lock()
+        self.error: Optional[str] = None
+
+    @property
+    def cflags(self) -> List[str]:
+        try:
+            return ["-include", str(self.build() / "prelude.h")]
+        except RuntimeError as error:
+            warnings.warn(
+                f"building without the precompiled header: {error}", RuntimeWarning
+            )
+            return []
+
+    @cached_property
+    def compiler(self) -> str:
+        return os.environ.get("CXX", "c++")
+
+    @cached_property
+    def flags(self) -> List[str]:
+        return [
+            "-std=c++17",
+            "-fPIC",
+            "-O2",
+            *self.extra_cflags,
+            *(
+                f"-I{path}"
+                for path in [
+                    find_include_path(),
+                    find_dlpack_include_path(),
+                    *self.extra_include_paths,
+                ]
+            ),
+        ]
+
+    @cached_property
+    def hash(self) -> str:
+        return stable_hash(
+            self.compiler,
+            self.flags,
+            self.source,
+            tvm_ffi.__version__,
+            torch.__version__,
+            *(
+                header.read_bytes()
+                for path in self.extra_include_paths
+                for header in sorted(Path(path).glob("triton_tvm_ffi/*.h"))
+            ),
+        )
+
+    @cached_property
+    def path(self) -> Path:
+        return self.root / "pch" / self.hash
+
+    @cached_property
+    def source(self) -> str:
+        return "".join(f"#include <{header}>\n" for header in self.headers)
+
+    def build(self) -> Path:
+        with self.lock:
+            if self.error is not None:
+                raise RuntimeError(self.error)
+            if not (self.path / "prelude.h.gch").exists():
+                self.path.mkdir(parents=True, exist_ok=True)
+                with FileLock(str(self.path / "lock")):
+                    if not (self.path / "prelude.h.gch").exists():
+                        (self.path / "prelude.h").write_text(self.source)
+                        status: subprocess.CompletedProcess = subprocess.run(
+                            [
+                                self.compiler,
+                                *self.flags,
+                                "-x",
+                                "c++-header",
+                                str(self.path / "prelude.h"),
+                                "-o",
+                                str(self.path / "prelude.h.gch.tmp"),
+                            ],
+                            capture_output=True,
+                        )
+                        if status.returncode != 0:
+                            self.error = (
+                                f"failed to precompile {self.path / 'prelude.h'}:\n"
+                                f"{status.stderr.decode(errors='replace')}"
+                            )
+                            raise RuntimeError(self.error)
+                        os.replace(
+                            self.path / "prelude.h.gch.tmp",
+                            self.path / "prelude.h.gch",
+                        )
+        return self.path
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Dict, Final, Iterator, List, Optional, Union
+
+
+class TVMFFIBuildProfiler(object):
+    def __init__(self, enabled: Optional[bool] = None, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.enabled: bool = (
+            enabled
+            if enabled is not None
+            else os.environ.get("TRITON_TVM_FFI_PROFILE", "0") not in ("", "0")
+        )
+        self.spans: Final[List[Dict[str, Any]]] = []
+        self.lock: Final[threading.Lock] = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[Dict[str, Any]]:
+        if not self.enabled:
+            yield args
+            return
+        begin: int = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            end: int = time.perf_counter_ns()
+            with self.lock:
+                self.spans.append(
+                    {
+                        "name": name,
+                        "cat": category,
+                        "ph": "X",
+                        "ts": begin / 1e3,
+                        "dur": (end - begin) / 1e3,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    }
+                )
+
+    def stats(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        stats: Dict[str, Dict[str, Union[int, float]]] = {}
+        with self.lock:
+            for span in self.spans:
+                stat: Dict[str, Union[int, float]] = stats.setdefault(
+                    span["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+                )
+                stat["count"] += 1
+                stat["total_ms"] += span["dur"] / 1e3
+                stat["max_ms"] = max(stat["max_ms"], span["dur"] / 1e3)
+                for k, v in span["args"].items():
+                    if k.endswith("_bytes"):
+                        stat[k] = stat.get(k, 0) + v
+        return stats
+
+    def trace(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"traceEvents": [*self.spans], "displayTimeUnit": "ms"}
+
+    def export(self, path: Union[str, Path]) -> None:
+        with open(path, "w") as f:
+            json.dump(self.trace(), f)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.spans.clear()
+
+
+build_profiler: Final[TVMFFIBuildProfiler] = TVMFFIBuildProfiler()
+
+
+def profile_builds(enabled: bool = True) -> None:
+    build_profiler.enabled = enabled
+
+
+def build_stats() -> Dict[str, Dict[str, Union[int, float]]]:
+    return build_profiler.stats()
+
+
+def export_build_trace(path: Union[str, Path]) -> None:
+    build_profiler.export(path)
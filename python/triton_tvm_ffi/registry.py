@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import os
+import threading
+from typing import Any, Dict, Final, List, Optional
+import weakref
+
+import tvm_ffi
+
+
+class TVMFFIModuleRegistry(object):
+    def __init__(self, budget: Optional[int] = None, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.budget: Optional[int] = (
+            budget
+            if budget is not None
+            else (
+                int(os.environ["TRITON_TVM_FFI_MODULE_BUDGET"])
+                if "TRITON_TVM_FFI_MODULE_BUDGET" in os.environ
+                else None
+            )
+        )
+        self.modules: Final[OrderedDict[str, weakref.WeakSet]] = OrderedDict()
+        self.users: Final[weakref.WeakKeyDictionary] = weakref.WeakKeyDictionary()
+        self.lock: Final[threading.RLock] = threading.RLock()
+
+    def use(self, wrapper: Any, uniquename: str) -> None:
+        with self.lock:
+            if (previous := self.users.get(wrapper)) is not None:
+                if previous == uniquename:
+                    return
+                if previous in self.modules:
+                    self.modules[previous].discard(wrapper)
+                    self.modules.move_to_end(previous)
+            self.users[wrapper] = uniquename
+            self.modules.setdefault(uniquename, weakref.WeakSet()).add(wrapper)
+            self.modules.move_to_end(uniquename)
+            self.evict()
+
+    def module(self, wrapper: Any) -> Optional[str]:
+        with self.lock:
+            return self.users.get(wrapper)
+
+    def resident(self, uniquename: str) -> int:
+        func: Optional[tvm_ffi.Function] = tvm_ffi.get_global_func(
+            f"{uniquename}.resident", allow_missing=True
+        )
+        return func() if func is not None else 0
+
+    def unload(self, uniquename: str) -> int:
+        func: Optional[tvm_ffi.Function] = tvm_ffi.get_global_func(
+            f"{uniquename}.unload", allow_missing=True
+        )
+        return func() if func is not None else 0
+
+    def evict(self) -> int:
+        with self.lock:
+            if self.budget is None:
+                return 0
+            total: int = sum(map(self.resident, self.modules))
+            freed: int = 0
+            for uniquename in self.stale():
+                if total <= self.budget:
+                    break
+                released: int = self.unload(uniquename)
+                total -= released
+                freed += released
+            return freed
+
+    def drop(self, uniquename: Optional[str] = None) -> int:
+        with self.lock:
+            names: List[str] = self.stale() if uniquename is None else [uniquename]
+            freed: int = 0
+            for name in names:
+                if self.modules.get(name):
+                    raise RuntimeError(f"module {name} is still in use")
+                freed += self.unload(name)
+                self.modules.pop(name, None)
+            return freed
+
+    def stale(self) -> List[str]:
+        with self.lock:
+            return [name for name, users in self.modules.items() if not users]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {
+                name: {"resident": self.resident(name), "users": len(users)}
+                for name, users in self.modules.items()
+            }
+
+
+module_registry: Final[TVMFFIModuleRegistry] = TVMFFIModuleRegistry()
+
+
+def module_stats() -> Dict[str, Dict[str, int]]:
+    return module_registry.stats()
+
+
+def drop_stale_modules() -> int:
+    return module_registry.drop()
@@ -1,7 +1,80 @@
+import hashlib
+import re
 import sysconfig
-from typing import List, Optional
+from typing import Any, Dict, Final, List, Optional, Tuple
 
+import torch
+from triton.backends.compiler import GPUTarget
 from triton.backends.nvidia.driver import ty_to_cpp
+import tvm_ffi
+
+DLPACK_TYPES: Final[Dict[str, Tuple[str, int]]] = {
+    "i1": ("kDLBool", 8),
+    "i8": ("kDLInt", 8),
+    "i16": ("kDLInt", 16),
+    "i32": ("kDLInt", 32),
+    "i64": ("kDLInt", 64),
+    "u8": ("kDLUInt", 8),
+    "u16": ("kDLUInt", 16),
+    "u32": ("kDLUInt", 32),
+    "u64": ("kDLUInt", 64),
+    "fp16": ("kDLFloat", 16),
+    "bf16": ("kDLBfloat", 16),
+    "fp32": ("kDLFloat", 32),
+    "fp64": ("kDLFloat", 64),
+    "fp8e4nv": ("kDLFloat8_e4m3fn", 8),
+    "fp8e4b8": ("kDLFloat8_e4m3fnuz", 8),
+    "fp8e5": ("kDLFloat8_e5m2", 8),
+    "fp8e5b16": ("kDLFloat8_e5m2fnuz", 8),
+}
+
+TORCH_TYPES: Final[Dict[str, str]] = {
+    "torch.bool": "i1",
+    "torch.int8": "i8",
+    "torch.int16": "i16",
+    "torch.int32": "i32",
+    "torch.int64": "i64",
+    "torch.uint8": "u8",
+    "torch.uint16": "u16",
+    "torch.uint32": "u32",
+    "torch.uint64": "u64",
+    "torch.float16": "fp16",
+    "torch.bfloat16": "bf16",
+    "torch.float32": "fp32",
+    "torch.float64": "fp64",
+    "torch.float8_e4m3fn": "fp8e4nv",
+    "torch.float8_e4m3fnuz": "fp8e4b8",
+    "torch.float8_e5m2": "fp8e5",
+    "torch.float8_e5m2fnuz": "fp8e5b16",
+}
+
+SCALAR_TYPES: Final[Dict[str, str]] = {
+    "fp16": "triton_tvm_ffi::Float16",
+    "bf16": "triton_tvm_ffi::BFloat16",
+    "fp32": "float",
+    "f32": "float",
+    "fp64": "double",
+}
+
+
+def ffi_to_python(value: Any) -> Any:
+    if isinstance(value, tvm_ffi.Map):
+        return {k: ffi_to_python(v) for k, v in value.items()}
+    elif isinstance(value, tvm_ffi.Array):
+        return [ffi_to_python(v) for v in value]
+    else:
+        return value
+
+
+def ffi_to_torch(value: Any) -> Any:
+    if isinstance(value, torch.Tensor):
+        return value
+    elif isinstance(value, (tvm_ffi.Array, tuple, list)):
+        return tuple(ffi_to_torch(v) for v in value)
+    elif hasattr(value, "__dlpack__"):
+        return torch.from_dlpack(value)
+    else:
+        return value
 
 
 def include_paths() -> List[str]:
@@ -9,8 +82,32 @@ def include_paths() -> List[str]:
     return [f"{pkg_path}/triton_tvm_ffi/include"]
 
 
+def stable_hash(*parts: Any) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else repr(part).encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()[:16]
+
+
+def target_entry(target: GPUTarget) -> List[Any]:
+    return [target.backend, target.arch, target.warp_size]
+
+
 def type_canonicalize(ty: str) -> Optional[str]:
     if ty == "constexpr":
         return None
+    elif ty in SCALAR_TYPES:
+        return SCALAR_TYPES[ty]
     else:
         return ty_to_cpp(ty)
+
+
+def type_descriptor(ty: str) -> Optional[Tuple[str, List[int]]]:
+    if (match := re.match(r"tensordesc<([^[>]*)\[([^\]]*)\]", ty)) is None:
+        return None
+    return match.group(1), [int(dim) for dim in match.group(2).split(",")]
+
+
+def type_dlpack(ty: str) -> Optional[Tuple[str, int]]:
+    return DLPACK_TYPES.get(ty)
@@ -1,14 +1,40 @@
-from functools import cached_property
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property, wraps
 from io import TextIOWrapper
+import os
 from pathlib import Path
-from typing import Any, Callable, Final, List, Optional, Sequence, Union
+import shutil
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+import warnings
 
 import jinja2
 import torch.utils.cpp_extension
+from triton.backends.compiler import GPUTarget
 import tvm_ffi
 
 from .jit import TVMFFIJITFunction
-from .utils import include_paths
+from .pch import TORCH_HEADERS, TVMFFIPrecompiledHeader
+from .profile import build_profiler
+from .registry import TVMFFIModuleRegistry, module_registry
+from .utils import ffi_to_python, ffi_to_torch, include_paths, stable_hash
+
+BUILD_EXECUTOR: Final[ThreadPoolExecutor] = ThreadPoolExecutor(
+    max_workers=os.cpu_count(), thread_name_prefix="triton_tvm_ffi"
+)
 
 
 class TVMFFIWrapperFunction(object):
@@ -21,6 +47,10 @@ class TVMFFIWrapperFunction(object):
         extra_cuda_cflags: Optional[Sequence[str]] = None,
         extra_ldflags: Optional[Sequence[str]] = None,
         extra_include_paths: Optional[Sequence[Union[str, Path]]] = None,
+        background: bool = False,
+        pch: Optional[TVMFFIPrecompiledHeader] = None,
+        eager: bool = False,
+        registry: TVMFFIModuleRegistry = module_registry,
         *args,
         **kwargs,
     ) -> None:
@@ -45,47 +75,307 @@ class TVMFFIWrapperFunction(object):
             trim_blocks=True,
         )
         self.tpl: Final[jinja2.Template] = self.env.get_template("gendef.cc.j2")
+        self.background: Final[bool] = background
+        self.pch: Final[Optional[TVMFFIPrecompiledHeader]] = pch
+        self.eager: Final[bool] = eager
+        self.registry: Final[TVMFFIModuleRegistry] = registry
+        self.func: Optional[tvm_ffi.Function] = None
+        self.loaded: Optional[tvm_ffi.Function] = None
+        self.batched: Optional[tvm_ffi.Function] = None
+        self.telemetry_mode: Optional[int] = None
+        self.op: Optional[torch.library.CustomOpDef] = None
+        self.generation: int = 0
+        self.pending: Dict[str, Future] = {}
+        self.lock: Final[threading.RLock] = threading.RLock()
+        for fn in self.fns:
+            fn.wrappers.add(self)
 
-    def __call__(self, *args, **kwargs) -> None:
-        func: tvm_ffi.Function = self.compile()
+    def __call__(self, *args, **kwargs) -> Any:
+        if self.op is not None:
+            return self.op(*args, **kwargs)
+        return self.invoke(*args, **kwargs)
+
+    def invoke(self, *args, **kwargs) -> Any:
+        func: Optional[tvm_ffi.Function] = self.func
+        if func is None:
+            func = self.compile()
         return func(*args, **kwargs)
 
+    def batch(self, batch: Sequence[Sequence[Any]]) -> List[Any]:
+        if self.op is not None:
+            return [self.op(*args) for args in batch]
+        if self.func is None:
+            self.compile()
+        return [*self.batched([[*args] for args in batch])]
+
+    def register_op(
+        self,
+        prototype: Callable[..., Any],
+        fake: Callable[..., Any],
+        mutates_args: Sequence[str] = (),
+    ) -> torch.library.CustomOpDef:
+        @wraps(prototype)
+        def impl(*args, **kwargs) -> Any:
+            return ffi_to_torch(self.invoke(*args, **kwargs))
+
+        op: torch.library.CustomOpDef = torch.library.custom_op(
+            self.opname, mutates_args=[*mutates_args]
+        )(impl)
+        op.register_fake(fake)
+        self.op = op
+        return op
+
+    def register_autograd(
+        self,
+        backward: TVMFFIWrapperFunction,
+        save: Optional[Callable[[Tuple[Any, ...], Any], Sequence[Any]]] = None,
+    ) -> None:
+        if self.op is None:
+            raise RuntimeError(
+                f"{self.name} must be registered as a custom op to pair a backward"
+            )
+
+        def setup_context(ctx: Any, inputs: Tuple[Any, ...], output: Any) -> None:
+            saved: List[Any] = [*(save(inputs, output) if save else inputs)]
+            ctx.tensors = [isinstance(value, torch.Tensor) for value in saved]
+            ctx.constants = [
+                value for value, tensor in zip(saved, ctx.tensors) if not tensor
+            ]
+            ctx.inputs = [isinstance(value, torch.Tensor) for value in inputs]
+            ctx.save_for_backward(
+                *(value for value, tensor in zip(saved, ctx.tensors) if tensor)
+            )
+
+        def grad(ctx: Any, *grads) -> Tuple[Optional[torch.Tensor], ...]:
+            tensors: Iterator[torch.Tensor] = iter(ctx.saved_tensors)
+            constants: Iterator[Any] = iter(ctx.constants)
+            saved: List[Any] = [
+                next(tensors) if tensor else next(constants) for tensor in ctx.tensors
+            ]
+            outputs: Any = ffi_to_torch(backward(*saved, *grads))
+            results: Iterator[torch.Tensor] = iter(
+                outputs if isinstance(outputs, tuple) else (outputs,)
+            )
+            return tuple(next(results) if tensor else None for tensor in ctx.inputs)
+
+        self.op.register_autograd(grad, setup_context=setup_context)
+
+    def telemetry(self) -> Dict[str, Any]:
+        return ffi_to_python(self.runtime("telemetry")())
+
+    def reset_telemetry(self) -> None:
+        self.runtime("telemetry_reset")()
+
+    def enable_telemetry(self, enabled: bool = True, events: bool = False) -> None:
+        self.telemetry_mode = (2 if events else 1) if enabled else 0
+        self.runtime("telemetry_mode")(self.telemetry_mode)
+
+    def runtime(self, name: str) -> tvm_ffi.Function:
+        if self.func is None:
+            self.compile()
+        return tvm_ffi.get_global_func(f"{self.registry.module(self)}.{name}")
+
     @property
-    def fns_hash(self) -> int:
-        return hash(tuple(fn.cache_hash for fn in self.fns))
+    def fns_hash(self) -> str:
+        return stable_hash(*(fn.cache_hash for fn in self.fns))
 
     @cached_property
     def fullname(self) -> str:
         return f"triton.{self.name}"
 
+    @cached_property
+    def opname(self) -> str:
+        return f"triton_tvm_ffi::{self.name}_{stable_hash(self.fullname, self.code)}"
+
     @property
     def emit(self) -> str:
-        return self.tpl.render(
-            code=self.code, fns=self.fns, name=self.name, uniquename=self.uniquename
-        )
+        with build_profiler.span("render", "wrapper", wrapper=self.name) as args:
+            source: str = self.tpl.render(
+                code=self.code, fns=self.fns, name=self.name, uniquename=self.uniquename
+            )
+            args["source_bytes"] = len(source.encode("utf-8"))
+        return source
 
     @property
     def uniquename(self) -> str:
         return f"{self.name}_{self.fns_hash}"
 
-    def compile(self) -> tvm_ffi.Function:
-        if func := tvm_ffi.get_global_func(self.uniquename, allow_missing=True):
-            return func
-        else:
-            tvm_ffi.cpp.load_inline(
+    @property
+    def cubins(self) -> Dict[str, bytes]:
+        with build_profiler.span("cubins", "wrapper", wrapper=self.name) as args:
+            cubins: Dict[str, bytes] = {
+                f"triton_{fn.fnname}_{i}": spec.kernel
+                for fn in self.fns
+                for i, spec in enumerate(fn.specializations)
+            }
+            args["cubins"] = len(cubins)
+            args["cubin_bytes"] = sum(map(len, cubins.values()))
+        return cubins
+
+    def build(self, target: Optional[GPUTarget] = None) -> str:
+        for fn in self.fns:
+            fn.restore(target)
+        _, source, cubins = self.snapshot()
+        return self.build_source(source, cubins)
+
+    def build_source(self, source: str, cubins: Dict[str, bytes]) -> str:
+        with build_profiler.span(
+            "compile",
+            "wrapper",
+            wrapper=self.name,
+            source_bytes=len(source.encode("utf-8")),
+            cubin_bytes=sum(map(len, cubins.values())),
+        ):
+            return tvm_ffi.cpp.build_inline(
                 self.name,
-                cpp_sources=[self.emit],
-                extra_cflags=self.extra_cflags,
+                cpp_sources=[source],
+                extra_cflags=[
+                    *(self.extra_cflags or []),
+                    *(self.pch.cflags if self.pch is not None else []),
+                ],
                 extra_cuda_cflags=self.extra_cuda_cflags,
                 extra_ldflags=self.extra_ldflags,
                 extra_include_paths=self.extra_include_paths,
-                embed_cubin={
-                    f"triton_{fn.fnname}": fn.kernel
-                    for fn in self.fns
-                    if fn.kernel is not None
-                },
+                embed_cubin=cubins,
+            )
+
+    def compile(self) -> tvm_ffi.Function:
+        with self.lock:
+            generation: int = self.generation
+        with build_profiler.span("wrapper", "wrapper", wrapper=self.name):
+            for fn in self.fns:
+                fn.restore()
+            uniquename: str = self.uniquename
+            if func := tvm_ffi.get_global_func(uniquename, allow_missing=True):
+                self.use(func, uniquename)
+            elif self.background and self.loaded is not None:
+                func = self.submit()
+            else:
+                func = self.use(self.load(self.build(), uniquename), uniquename)
+        with self.lock:
+            if generation == self.generation:
+                self.func = func
+        return func
+
+    def export(self, path: Union[str, Path], target: Optional[GPUTarget] = None) -> str:
+        for fn in self.fns:
+            fn.restore(target)
+            if not fn.specializations:
+                raise RuntimeError(
+                    f"{fn.fnname} has no captured specialization to export"
+                )
+        shutil.copyfile(self.build(target), path)
+        return self.uniquename
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.func = None
+            self.generation += 1
+
+    def load(self, path: str, uniquename: str) -> tvm_ffi.Function:
+        with build_profiler.span("load", "wrapper", wrapper=self.name):
+            tvm_ffi.load_module(path)
+        if self.eager:
+            with build_profiler.span("preload", "wrapper", wrapper=self.name):
+                tvm_ffi.get_global_func(f"{uniquename}.preload")()
+        return tvm_ffi.get_global_func(uniquename)
+
+    def use(self, func: tvm_ffi.Function, uniquename: str) -> tvm_ffi.Function:
+        with self.lock:
+            self.loaded = func
+            self.batched = tvm_ffi.get_global_func(f"{uniquename}.batch")
+            if self.telemetry_mode is not None:
+                tvm_ffi.get_global_func(f"{uniquename}.telemetry_mode")(
+                    self.telemetry_mode
+                )
+        self.registry.use(self, uniquename)
+        return func
+
+    def preload(self) -> None:
+        self.compile()
+        with build_profiler.span("preload", "wrapper", wrapper=self.name):
+            tvm_ffi.get_global_func(f"{self.uniquename}.preload")()
+
+    def snapshot(self) -> Tuple[str, str, Dict[str, bytes]]:
+        with self.lock:
+            uniquename: str = ""
+            while uniquename != self.uniquename:
+                uniquename = self.uniquename
+                source: str = self.emit
+                cubins: Dict[str, bytes] = self.cubins
+        return uniquename, source, cubins
+
+    def submit(self) -> tvm_ffi.Function:
+        with self.lock:
+            uniquename, source, cubins = self.snapshot()
+            future: Optional[Future] = self.pending.get(uniquename)
+            submitted: bool = future is None
+            if submitted:
+                future = BUILD_EXECUTOR.submit(self.build_source, source, cubins)
+                self.pending[uniquename] = future
+            loaded: tvm_ffi.Function = self.loaded
+        if submitted:
+            future.add_done_callback(lambda future: self.swap(future, uniquename))
+        return loaded
+
+    def swap(self, future: Future, uniquename: str) -> None:
+        with self.lock:
+            if self.pending.get(uniquename) is not future:
+                return
+            if (error := future.exception()) is not None:
+                del self.pending[uniquename]
+        if error is not None:
+            warnings.warn(
+                f"background build of {uniquename} failed, still serving the "
+                f"previous module: {error}",
+                RuntimeWarning,
+            )
+            return
+        func: tvm_ffi.Function = self.load(future.result(), uniquename)
+        with self.lock:
+            if self.pending.get(uniquename) is not future:
+                return
+            for name in [*self.pending]:
+                del self.pending[name]
+                if name == uniquename:
+                    break
+            self.use(func, uniquename)
+            self.func = None
+            self.generation += 1
+
+
+def build_all(
+    wrappers: Sequence[TVMFFIWrapperFunction],
+    workers: Optional[int] = None,
+    target: Optional[GPUTarget] = None,
+) -> List[tvm_ffi.Function]:
+    for wrapper in wrappers:
+        for fn in wrapper.fns:
+            fn.restore(target)
+    pending: Dict[str, TVMFFIWrapperFunction] = {
+        wrapper.uniquename: wrapper
+        for wrapper in wrappers
+        if tvm_ffi.get_global_func(wrapper.uniquename, allow_missing=True) is None
+    }
+    sources: List[Tuple[str, Dict[str, bytes]]] = [
+        (wrapper.emit, wrapper.cubins) for wrapper in pending.values()
+    ]
+    with ThreadPoolExecutor(
+        max_workers=workers or os.cpu_count(), thread_name_prefix="triton_tvm_ffi"
+    ) as executor:
+        paths: List[str] = [
+            *executor.map(
+                lambda wrapper, source: wrapper.build_source(*source),
+                pending.values(),
+                sources,
             )
-            return tvm_ffi.get_global_func(self.uniquename)
+        ]
+    for (uniquename, wrapper), path in zip(pending.items(), paths):
+        wrapper.load(path, uniquename)
+    return [
+        wrapper.use(tvm_ffi.get_global_func(wrapper.uniquename), wrapper.uniquename)
+        for wrapper in wrappers
+    ]
 
 
 def wrap(
@@ -95,7 +385,19 @@ def wrap(
     extra_cuda_cflags: Optional[Sequence[str]] = None,
     extra_ldflags: Optional[Sequence[str]] = None,
     extra_include_paths: Optional[Sequence[Union[str, Path]]] = None,
+    background: bool = False,
+    precompiled_headers: Optional[Sequence[str]] = None,
+    eager: bool = False,
 ) -> TVMFFIWrapperFunction:
+    extra_include_paths: List[Union[str, Path]] = include_paths() + [
+        *(extra_include_paths or [])
+    ]
+    pch: Optional[TVMFFIPrecompiledHeader] = (
+        TVMFFIPrecompiledHeader(precompiled_headers, extra_cflags, extra_include_paths)
+        if precompiled_headers
+        else None
+    )
+
     def decorate(fn: Union[str, Callable[..., Any]]) -> TVMFFIWrapperFunction:
         return TVMFFIWrapperFunction(
             fn if isinstance(fn, str) else fn.__name__,
@@ -104,7 +406,10 @@ def wrap(
             extra_cflags,
             extra_cuda_cflags,
             extra_ldflags,
-            include_paths() + (extra_include_paths or []),
+            extra_include_paths,
+            background,
+            pch,
+            eager,
         )
 
     return decorate
@@ -117,9 +422,22 @@ def torch_wrap(
     extra_cuda_cflags: Optional[Sequence[str]] = None,
     extra_ldflags: Optional[Sequence[str]] = None,
     extra_include_paths: Optional[Sequence[Union[str, Path]]] = None,
+    background: bool = False,
+    precompiled_headers: Optional[Sequence[str]] = TORCH_HEADERS,
+    eager: bool = False,
+    custom_op: bool = False,
+    fake: Optional[Callable[..., Any]] = None,
+    mutates_args: Sequence[str] = (),
+    backward: Optional[TVMFFIWrapperFunction] = None,
+    save: Optional[Callable[[Tuple[Any, ...], Any], Sequence[Any]]] = None,
 ) -> TVMFFIWrapperFunction:
+    if custom_op and fake is None:
+        raise TypeError(
+            "custom_op=True needs an explicit fake implementation that describes "
+            "the outputs, pass fake="
+        )
     cuda_home: str = tvm_ffi.cpp.extension._find_cuda_home()
-    return wrap(
+    decorate: Callable[..., TVMFFIWrapperFunction] = wrap(
         fns,
         code,
         extra_ldflags=[
@@ -141,4 +459,17 @@ def torch_wrap(
             *torch.utils.cpp_extension.include_paths(),
         ]
         + (extra_include_paths or []),
+        background=background,
+        precompiled_headers=precompiled_headers,
+        eager=eager,
     )
+
+    def register(fn: Union[str, Callable[..., Any]]) -> TVMFFIWrapperFunction:
+        wrapper: TVMFFIWrapperFunction = decorate(fn)
+        if custom_op:
+            wrapper.register_op(fn, fake, mutates_args)
+        if backward is not None:
+            wrapper.register_autograd(backward, save)
+        return wrapper
+
+    return register
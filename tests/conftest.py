@@ -0,0 +1,155 @@
+import ctypes
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pytest
+import triton
+from triton.backends.compiler import GPUTarget
+from triton.compiler import ASTSource, CompiledKernel
+import triton.language as tl
+from triton.runtime import driver
+
+from triton_tvm_ffi.cache import TVMFFICaptureCache
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.kernel import TVMFFIKernel
+from triton_tvm_ffi.utils import include_paths, stable_hash, type_canonicalize
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from standin import StandinDriver, compile_driver, wrapper_flags
+
+SM80: GPUTarget = GPUTarget("cuda", 80, 32)
+SM90: GPUTarget = GPUTarget("cuda", 90, 32)
+
+ADD_TYPES: List[str] = ["*fp32", "*fp32", "*fp32", "i32", "constexpr"]
+
+WRAPPER = """
+#include <cstdint>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+void Add(tvm::ffi::Tensor x, tvm::ffi::Tensor y, tvm::ffi::Tensor output,
+         int64_t block) {{
+  int64_t numel = x.numel();
+  tvm::ffi::Array<tvm::ffi::Any> args = {{x, y, output, numel, block}};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {{}};
+  tvm::ffi::Tuple<int32_t, int32_t, int32_t> grid(
+      static_cast<int32_t>((numel + block - 1) / block), 1, 1);
+  ADD_KERNEL_STUB(grid, x.device().device_id, nullptr, args, kwargs);
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME, Add);
+}}
+"""
+
+
+@triton.jit
+def add_kernel(x_ptr, y_ptr, output_ptr, n_elements, BLOCK_SIZE: tl.constexpr):
+    pid = tl.program_id(axis=0)
+    offsets = pid * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+    mask = offsets < n_elements
+    x = tl.load(x_ptr + offsets, mask=mask)
+    y = tl.load(y_ptr + offsets, mask=mask)
+    tl.store(output_ptr + offsets, x + y, mask=mask)
+
+
+@pytest.fixture(scope="session")
+def standin() -> ctypes.CDLL:
+    return compile_driver()
+
+
+@pytest.fixture(autouse=True)
+def target(monkeypatch: pytest.MonkeyPatch) -> StandinDriver:
+    active: StandinDriver = StandinDriver(SM80)
+    monkeypatch.setattr(driver, "_active", active)
+    return active
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> TVMFFICaptureCache:
+    return TVMFFICaptureCache(tmp_path / "capture")
+
+
+@pytest.fixture
+def add(cache: TVMFFICaptureCache) -> TVMFFIJITFunction:
+    return TVMFFIJITFunction(add_kernel, cache=cache)
+
+
+@pytest.fixture
+def make_wrapper(
+    request: pytest.FixtureRequest, standin: ctypes.CDLL
+) -> Callable[..., TVMFFIWrapperFunction]:
+    def make(
+        fns: Sequence[TVMFFIJITFunction],
+        suffix: str = "",
+        code: str = WRAPPER,
+        **kwargs,
+    ) -> TVMFFIWrapperFunction:
+        name: str = f"add_{stable_hash(request.node.nodeid, suffix)[:12]}"
+        flags: Dict[str, List[Any]] = wrapper_flags(standin)
+        return TVMFFIWrapperFunction(
+            name,
+            [*fns],
+            code.format(name=name.upper()),
+            flags["extra_cflags"],
+            None,
+            flags["extra_ldflags"],
+            include_paths() + flags["extra_include_paths"],
+            **kwargs,
+        )
+
+    return make
+
+
+def specialize(
+    fn: TVMFFIJITFunction,
+    label: str,
+    types: Sequence[str] = ADD_TYPES,
+    constants: Optional[Dict[str, Any]] = None,
+    best_config: Optional[Dict[str, Any]] = None,
+    **kwargs,
+) -> TVMFFIKernel:
+    constants: Dict[str, Any] = (
+        {"BLOCK_SIZE": 1024, **(constants or {})} if best_config is None else {}
+    )
+    spec: TVMFFIKernel = TVMFFIKernel(
+        label,
+        f"{label}\0".encode("utf-8"),
+        [type_canonicalize(ty) for ty in types],
+        4,
+        0,
+        best_config,
+        TVMFFIKernel.make_guards(
+            fn.params,
+            types,
+            {(fn.signature.index(k),): v for k, v in constants.items()},
+            {},
+            best_config or {},
+        ),
+        constants,
+        **kwargs,
+    )
+    fn.kernels[spec.hash] = spec
+    fn.invalidate()
+    return spec
+
+
+def compile_add(types: Sequence[str], target: GPUTarget = SM80) -> CompiledKernel:
+    return triton.compile(
+        ASTSource(
+            add_kernel,
+            {
+                name: ty
+                for name, ty in zip(
+                    ["x_ptr", "y_ptr", "output_ptr", "n_elements", "BLOCK_SIZE"], types
+                )
+            },
+            {(4,): 1024},
+        ),
+        target=target,
+    )
+
+
+def launched_grid(standin: ctypes.CDLL) -> Tuple[int, int, int]:
+    dims: int = standin.triton_tvm_ffi_grid()
+    return (dims & 0xFFFFF, dims >> 20 & 0xFFFFF, dims >> 40)
@@ -0,0 +1,87 @@
+import ctypes
+import time
+from typing import Callable, Dict, List
+
+import pytest
+import torch
+
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import specialize
+
+
+def settle(wrapper: TVMFFIWrapperFunction, timeout: float = 300.0) -> None:
+    deadline: float = time.monotonic() + timeout
+    while wrapper.pending:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_background_swap_after_failure(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    specialize(add, "fp32")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add], background=True)
+    x: torch.Tensor = torch.rand(4096)
+    h: torch.Tensor = x.half()
+    wrapper(x, x, torch.empty_like(x), 1024)
+    served: str = wrapper.uniquename
+    build_source: Callable[[str, Dict[str, bytes]], str] = wrapper.build_source
+    failures: List[Exception] = [RuntimeError("compiler crashed")]
+
+    def flaky(source: str, cubins: Dict[str, bytes]) -> str:
+        if failures:
+            raise failures.pop()
+        return build_source(source, cubins)
+
+    monkeypatch.setattr(wrapper, "build_source", flaky)
+    specialize(add, "fp16", ["*fp16", "*fp16", "*fp16", "i32", "constexpr"])
+    with pytest.warns(RuntimeWarning, match="compiler crashed"):
+        wrapper(x, x, torch.empty_like(x), 1024)
+        settle(wrapper)
+    assert standin.triton_tvm_ffi_launched() == b"fp32"
+    assert wrapper.registry.module(wrapper) == served
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert wrapper.func is wrapper.loaded
+    wrapper.invalidate()
+    wrapper(x, x, torch.empty_like(x), 1024)
+    settle(wrapper)
+    assert wrapper.registry.module(wrapper) == wrapper.uniquename != served
+    wrapper(h, h, torch.empty_like(h), 1024)
+    assert standin.triton_tvm_ffi_launched() == b"fp16"
+    assert wrapper.func is wrapper.loaded
+
+
+def test_background_build_snapshots_source_and_cubins(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    specialize(add, "fp32")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add], background=True)
+    x: torch.Tensor = torch.rand(4096)
+    h: torch.Tensor = x.half()
+    wrapper(x, x, torch.empty_like(x), 1024)
+    emit: property = TVMFFIWrapperFunction.emit
+    landed: List[str] = []
+
+    def racy(self: TVMFFIWrapperFunction) -> str:
+        source: str = emit.fget(self)
+        if self is wrapper and not landed:
+            landed.append(source)
+            specialize(add, "fp16", ["*fp16", "*fp16", "*fp16", "i32", "constexpr"])
+        return source
+
+    monkeypatch.setattr(TVMFFIWrapperFunction, "emit", property(racy))
+    specialize(add, "block256", constants={"BLOCK_SIZE": 256})
+    wrapper(x, x, torch.empty_like(x), 1024)
+    settle(wrapper)
+    assert len(landed) == 1
+    assert wrapper.registry.module(wrapper) == wrapper.uniquename
+    wrapper(h, h, torch.empty_like(h), 1024)
+    assert standin.triton_tvm_ffi_launched() == b"fp16"
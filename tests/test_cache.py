@@ -0,0 +1,67 @@
+from typing import Callable, Dict
+
+import triton
+
+from triton_tvm_ffi.cache import TVMFFICaptureCache
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.kernel import TVMFFIKernel
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import SM80, SM90, add_kernel
+
+SIGNATURE: Dict[str, str] = {
+    "x_ptr": "*fp32",
+    "y_ptr": "*fp32",
+    "output_ptr": "*fp32",
+    "n_elements": "i32",
+}
+
+
+def test_capture_cache_restores_specializations(cache: TVMFFICaptureCache) -> None:
+    fn: TVMFFIJITFunction = TVMFFIJITFunction(add_kernel, cache=cache)
+    spec: TVMFFIKernel = fn.precompile(
+        SIGNATURE,
+        target=SM80,
+        config=triton.Config({"BLOCK_SIZE": 1024}, num_warps=4),
+        key={"n_elements": 4096},
+    )
+    restored: TVMFFIJITFunction = TVMFFIJITFunction(add_kernel, cache=cache)
+    assert restored.restore(SM80)
+    assert restored.kernels[spec.hash].entry == spec.entry
+    assert restored.tunings == fn.tunings
+    assert cache.stats() == {"hits": 1, "misses": 0}
+
+
+def test_capture_cache_misses_other_target(cache: TVMFFICaptureCache) -> None:
+    TVMFFIJITFunction(add_kernel, cache=cache).precompile(
+        SIGNATURE, {"BLOCK_SIZE": 1024}, target=SM80
+    )
+    restored: TVMFFIJITFunction = TVMFFIJITFunction(add_kernel, cache=cache)
+    assert not restored.restore(SM90)
+    assert cache.stats() == {"hits": 0, "misses": 1}
+
+
+def test_precompile_keeps_specializations_per_target(
+    cache: TVMFFICaptureCache, make_wrapper: Callable[..., TVMFFIWrapperFunction]
+) -> None:
+    fn: TVMFFIJITFunction = TVMFFIJITFunction(add_kernel, cache=cache)
+    sm80: TVMFFIKernel = fn.precompile(SIGNATURE, {"BLOCK_SIZE": 1024}, target=SM80)
+    sm90: TVMFFIKernel = fn.precompile(SIGNATURE, {"BLOCK_SIZE": 1024}, target=SM90)
+    assert sm80.target == ["cuda", 80, 32]
+    assert sm90.target == ["cuda", 90, 32]
+    wrapper: TVMFFIWrapperFunction = make_wrapper([fn])
+    fn.restore(SM80)
+    assert fn.specializations == [sm80]
+    assert [*wrapper.cubins.values()] == [sm80.kernel]
+    uniquename: str = wrapper.uniquename
+    fn.restore(SM90)
+    assert fn.specializations == [sm90]
+    assert [*wrapper.cubins.values()] == [sm90.kernel]
+    assert wrapper.uniquename != uniquename
+    cache.reset_stats()
+    restored: TVMFFIJITFunction = TVMFFIJITFunction(add_kernel, cache=cache)
+    assert restored.restore(SM90)
+    assert restored.restore(SM80)
+    assert set(restored.kernels) == {sm80.hash, sm90.hash}
+    assert [spec.hash for spec in restored.specializations] == [sm80.hash]
+    assert cache.stats() == {"hits": 2, "misses": 0}
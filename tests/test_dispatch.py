@@ -0,0 +1,311 @@
+import ctypes
+from typing import Any, Callable, List, Tuple
+
+import pytest
+import torch
+import triton
+from triton.compiler import CompiledKernel
+import triton.language as tl
+
+from triton_tvm_ffi.cache import TVMFFICaptureCache
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import ADD_TYPES, compile_add, launched_grid, specialize
+
+SCALED = """
+#include <cstdint>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+void Scaled(tvm::ffi::Tensor x, tvm::ffi::Tensor y, tvm::ffi::Tensor output,
+            tvm::ffi::Any scale) {{
+  int64_t numel = x.numel();
+  tvm::ffi::Array<tvm::ffi::Any> args = {{x, y, output, numel, 1024}};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {{{{"SCALE", scale}}}};
+  tvm::ffi::Tuple<int32_t, int32_t, int32_t> grid(
+      static_cast<int32_t>((numel + 1023) / 1024), 1, 1);
+  SCALED_KERNEL_STUB(grid, x.device().device_id, nullptr, args, kwargs);
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME, Scaled);
+}}
+"""
+
+TYPED = """
+#include <cstdint>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+void Generic(tvm::ffi::Tensor x, tvm::ffi::Tensor y, tvm::ffi::Tensor output,
+             int64_t block) {{
+  int64_t numel = x.numel();
+  tvm::ffi::Array<tvm::ffi::Any> args = {{x, y, output, numel, block}};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {{}};
+  tvm::ffi::Tuple<int32_t, int32_t, int32_t> grid(
+      static_cast<int32_t>((numel + block - 1) / block), 1, 1);
+  ADD_KERNEL_STUB(grid, x.device().device_id, nullptr, args, kwargs);
+}}
+
+void Typed(tvm::ffi::Tensor x, tvm::ffi::Tensor y, tvm::ffi::Tensor output,
+           int64_t block) {{
+  int64_t numel = x.numel();
+  add_kernel_launch(static_cast<int32_t>((numel + block - 1) / block),
+                    x.device().device_id, nullptr, x, y, output, numel, block);
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME, Generic);
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME ".typed", Typed);
+}}
+"""
+
+TUNED = """
+#include <cstdint>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+void Generic(tvm::ffi::Tensor x, tvm::ffi::Tensor y, tvm::ffi::Tensor output) {{
+  int64_t numel = x.numel();
+  tvm::ffi::Array<tvm::ffi::Any> args = {{x, y, output, numel}};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {{}};
+  auto grid = [numel](const auto &meta) {{
+    return (numel + meta["BLOCK_SIZE"] - 1) / meta["BLOCK_SIZE"];
+  }};
+  TUNED_KERNEL_STUB(grid, x.device().device_id, nullptr, args, kwargs);
+}}
+
+void Typed(tvm::ffi::Tensor x, tvm::ffi::Tensor y, tvm::ffi::Tensor output) {{
+  int64_t numel = x.numel();
+  auto grid = [numel](const auto &meta) {{
+    return (numel + meta["BLOCK_SIZE"] - 1) / meta["BLOCK_SIZE"];
+  }};
+  tuned_kernel_launch(grid, x.device().device_id, nullptr, x, y, output, numel);
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME, Generic);
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME ".typed", Typed);
+}}
+"""
+
+LAMBDA = """
+#include <cstdint>
+#include <tuple>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+void Add(tvm::ffi::Tensor x, tvm::ffi::Tensor y, tvm::ffi::Tensor output,
+         int64_t block) {{
+  int64_t numel = x.numel();
+  tvm::ffi::Array<tvm::ffi::Any> args = {{x, y, output, numel, block}};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {{}};
+  auto grid = [numel](const auto &meta) {{
+    return std::make_tuple((numel + meta["BLOCK_SIZE"] - 1) / meta["BLOCK_SIZE"],
+                           2, 1);
+  }};
+  ADD_KERNEL_STUB(grid, x.device().device_id, nullptr, args, kwargs);
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME, Add);
+}}
+"""
+
+
+@triton.autotune(configs=[triton.Config({"BLOCK_SIZE": 512})], key=["n_elements"])
+@triton.jit
+def tuned_kernel(x_ptr, y_ptr, output_ptr, n_elements, BLOCK_SIZE: tl.constexpr):
+    offsets = tl.program_id(axis=0) * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+    mask = offsets < n_elements
+    output = tl.load(x_ptr + offsets, mask=mask) + tl.load(y_ptr + offsets, mask=mask)
+    tl.store(output_ptr + offsets, output, mask=mask)
+
+
+@triton.jit
+def scaled_kernel(
+    x_ptr,
+    y_ptr,
+    output_ptr,
+    n_elements,
+    BLOCK_SIZE: tl.constexpr,
+    SCALE: tl.constexpr = None,
+):
+    offsets = tl.program_id(axis=0) * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+    mask = offsets < n_elements
+    output = tl.load(x_ptr + offsets, mask=mask) + tl.load(y_ptr + offsets, mask=mask)
+    if SCALE is not None:
+        output = output * SCALE
+    tl.store(output_ptr + offsets, output, mask=mask)
+
+
+def test_guards_select_specialization(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+) -> None:
+    specialize(add, "fp32")
+    specialize(add, "fp16", ["*fp16", "*fp16", "*fp16", "i32", "constexpr"])
+    specialize(add, "block256", constants={"BLOCK_SIZE": 256})
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    x: torch.Tensor = torch.rand(4096)
+    h: torch.Tensor = x.half()
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert standin.triton_tvm_ffi_launched() == b"fp32"
+    wrapper(h, h, torch.empty_like(h), 1024)
+    assert standin.triton_tvm_ffi_launched() == b"fp16"
+    wrapper(x, x, torch.empty_like(x), 256)
+    assert standin.triton_tvm_ffi_launched() == b"block256"
+    assert wrapper.telemetry()["add_kernel"]["fallbacks"] == 0
+
+
+def test_unmatched_guards_fall_back_and_capture(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    monkeypatch,
+) -> None:
+    specialize(add, "fp32")
+    kernel: CompiledKernel = compile_add(
+        ["*fp64", "*fp64", "*fp64", "i32", "constexpr"]
+    )
+    calls: List[Any] = []
+
+    class Launcher(object):
+        def __getitem__(self, grid: Any) -> Callable[..., CompiledKernel]:
+            def launch(*args, **kwargs) -> CompiledKernel:
+                calls.append(args)
+                return kernel
+
+            return launch
+
+    monkeypatch.setattr(add, "fn", Launcher())
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    x: torch.Tensor = torch.rand(4096, dtype=torch.float64)
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert len(calls) == 1
+    assert isinstance(calls[0][0], torch.Tensor)
+    assert calls[0][3] == 4096
+    assert kernel.hash in add.kernels
+    assert wrapper.func is None
+    launches: int = standin.triton_tvm_ffi_launches()
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert len(calls) == 1
+    assert standin.triton_tvm_ffi_launches() == launches + 1
+    assert standin.triton_tvm_ffi_launched() != b"fp32"
+
+
+def test_none_constexpr_is_guarded(
+    cache: TVMFFICaptureCache,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fn: TVMFFIJITFunction = TVMFFIJITFunction(scaled_kernel, cache=cache)
+    specialize(fn, "unscaled", ADD_TYPES + ["constexpr"], {"SCALE": None})
+    specialize(fn, "scaled2", ADD_TYPES + ["constexpr"], {"SCALE": 2})
+    kernel: CompiledKernel = compile_add(ADD_TYPES)
+    calls: List[Any] = []
+
+    class Launcher(object):
+        def __getitem__(self, grid: Any) -> Callable[..., CompiledKernel]:
+            def launch(*args, **kwargs) -> CompiledKernel:
+                calls.append(kwargs)
+                return kernel
+
+            return launch
+
+    monkeypatch.setattr(fn, "fn", Launcher())
+    wrapper: TVMFFIWrapperFunction = make_wrapper([fn], code=SCALED)
+    x: torch.Tensor = torch.rand(4096)
+    wrapper(x, x, torch.empty_like(x), None)
+    assert standin.triton_tvm_ffi_launched() == b"unscaled"
+    wrapper(x, x, torch.empty_like(x), 2)
+    assert standin.triton_tvm_ffi_launched() == b"scaled2"
+    launches: int = standin.triton_tvm_ffi_launches()
+    wrapper(x, x, torch.empty_like(x), 3)
+    assert standin.triton_tvm_ffi_launches() == launches
+    assert calls == [{"SCALE": 3}]
+
+
+def test_typed_launch_matches_generic_dispatch(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+) -> None:
+    specialize(add, "typed")
+    specialize(add, "typed256", constants={"BLOCK_SIZE": 256})
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add], code=TYPED)
+    typed: Callable[..., Any] = wrapper.runtime("typed")
+    x: torch.Tensor = torch.rand(4096)
+    for block in (1024, 256):
+        launches: int = standin.triton_tvm_ffi_launches()
+        wrapper(x, x, torch.empty_like(x), block)
+        generic: Tuple[bytes, Tuple[int, int, int]] = (
+            standin.triton_tvm_ffi_launched(),
+            launched_grid(standin),
+        )
+        typed(x, x, torch.empty_like(x), block)
+        assert (standin.triton_tvm_ffi_launched(), launched_grid(standin)) == generic
+        assert standin.triton_tvm_ffi_launches() == launches + 2
+    assert generic == (b"typed256", (16, 1, 1))
+    assert wrapper.telemetry()["add_kernel"]["fallbacks"] == 0
+
+
+def test_typed_launch_leaves_tuned_params_to_the_spec(
+    cache: TVMFFICaptureCache,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+) -> None:
+    fn: TVMFFIJITFunction = TVMFFIJITFunction(tuned_kernel, cache=cache)
+    assert [name for _, name in fn.launch_params] == [
+        "x_ptr",
+        "y_ptr",
+        "output_ptr",
+        "n_elements",
+    ]
+    specialize(fn, "tuned", best_config={"BLOCK_SIZE": 512})
+    wrapper: TVMFFIWrapperFunction = make_wrapper([fn], code=TUNED)
+    x: torch.Tensor = torch.rand(4096)
+    wrapper(x, x, torch.empty_like(x))
+    assert standin.triton_tvm_ffi_launched() == b"tuned"
+    assert launched_grid(standin) == (8, 1, 1)
+    launches: int = standin.triton_tvm_ffi_launches()
+    wrapper.runtime("typed")(x, x, torch.empty_like(x))
+    assert standin.triton_tvm_ffi_launches() == launches + 1
+    assert standin.triton_tvm_ffi_launched() == b"tuned"
+    assert launched_grid(standin) == (8, 1, 1)
+
+
+def test_lambda_grid_reads_block_from_meta(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    monkeypatch,
+) -> None:
+    specialize(add, "lambda1024")
+    specialize(add, "lambda256", constants={"BLOCK_SIZE": 256})
+    kernel: CompiledKernel = compile_add(
+        ["*fp64", "*fp64", "*fp64", "i32", "constexpr"]
+    )
+    grids: List[Any] = []
+
+    class Launcher(object):
+        def __getitem__(self, grid: Any) -> Callable[..., CompiledKernel]:
+            grids.append(grid)
+            return lambda *args, **kwargs: kernel
+
+    monkeypatch.setattr(add, "fn", Launcher())
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add], code=LAMBDA)
+    x: torch.Tensor = torch.rand(4096)
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert standin.triton_tvm_ffi_launched() == b"lambda1024"
+    assert launched_grid(standin) == (4, 2, 1)
+    wrapper(x, x, torch.empty_like(x), 256)
+    assert standin.triton_tvm_ffi_launched() == b"lambda256"
+    assert launched_grid(standin) == (16, 2, 1)
+    double: torch.Tensor = torch.rand(4096, dtype=torch.float64)
+    wrapper(double, double, torch.empty_like(double), 512)
+    assert len(grids) == 1
+    assert tuple(grids[0]({"BLOCK_SIZE": 512})) == (8, 2, 1)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+import ctypes
+from typing import Any, Callable, List
+
+import pytest
+import torch
+from triton.compiler import CompiledKernel
+
+from triton_tvm_ffi.graph import GRAPH_CAPTURE, GRAPH_IDLE, GRAPH_PATCH, TVMFFIGraph
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import compile_add, specialize
+
+
+class Stream(object):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__()
+        self.cuda_stream: int = 0
+
+    def wait_stream(self, stream: Stream) -> None:
+        pass
+
+
+@pytest.fixture
+def cpu_graph(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(torch.cuda, "Stream", Stream)
+    monkeypatch.setattr(torch.cuda, "stream", lambda stream: nullcontext())
+    monkeypatch.setattr(torch.cuda, "current_stream", Stream)
+    monkeypatch.setattr(torch.cuda, "MemPool", object)
+    monkeypatch.setattr(torch.cuda, "use_mem_pool", lambda pool, device: nullcontext())
+
+
+def test_new_args_patch_kernel_nodes_in_place(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+) -> None:
+    specialize(add, "graph")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    record: Callable[..., Any] = wrapper.runtime("graph_record")
+    stream: ctypes.c_void_p = ctypes.c_void_p(0)
+    x: torch.Tensor = torch.rand(4096)
+    y: torch.Tensor = torch.rand(4096)
+    launches: int = standin.triton_tvm_ffi_launches()
+    graph: Any = wrapper.runtime("graph_begin")(stream, None)
+    record(graph, GRAPH_CAPTURE)
+    wrapper(x, x, torch.empty_like(x), 1024)
+    record(None, GRAPH_IDLE)
+    wrapper.runtime("graph_end")(stream, graph, True)
+    patches: int = standin.triton_tvm_ffi_patches()
+    wrapper.runtime("graph_patch")(graph)
+    record(graph, GRAPH_PATCH)
+    wrapper(y, y, torch.empty_like(y), 1024)
+    record(None, GRAPH_IDLE)
+    assert wrapper.runtime("graph_patched")(graph)
+    assert standin.triton_tvm_ffi_patches() == patches + 1
+    assert standin.triton_tvm_ffi_patched() == b"graph"
+    assert standin.triton_tvm_ffi_patched_arg() == y.data_ptr()
+    replays: int = standin.triton_tvm_ffi_replays()
+    wrapper.runtime("graph_launch")(graph, stream)
+    assert standin.triton_tvm_ffi_replays() == replays + 1
+    assert standin.triton_tvm_ffi_launches() == launches
+    empty: torch.Tensor = torch.rand(0)
+    wrapper.runtime("graph_patch")(graph)
+    record(graph, GRAPH_PATCH)
+    wrapper(empty, empty, torch.empty_like(empty), 1024)
+    record(None, GRAPH_IDLE)
+    assert not wrapper.runtime("graph_patched")(graph)
+    wrapper.runtime("graph_destroy")(graph)
+
+
+def test_graph_capture_replay_patch_and_rebuild(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    cpu_graph: None,
+) -> None:
+    specialize(add, "graph")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+
+    def run(x: torch.Tensor, output: torch.Tensor) -> torch.Tensor:
+        wrapper(x, x, output, 1024)
+        return output
+
+    graph: TVMFFIGraph = TVMFFIGraph(run, [wrapper], 0)
+    with pytest.raises(RuntimeError, match="not been captured"):
+        graph.runtime("launch")
+    with pytest.raises(RuntimeError, match="not been captured"):
+        graph.replay()
+    x: torch.Tensor = torch.rand(4096)
+    output: torch.Tensor = torch.empty_like(x)
+    launches: int = standin.triton_tvm_ffi_launches()
+    captures: int = standin.triton_tvm_ffi_captures()
+    replays: int = standin.triton_tvm_ffi_replays()
+    assert graph(x, output) is output
+    assert standin.triton_tvm_ffi_captures() == captures + 1
+    assert standin.triton_tvm_ffi_replays() == replays + 1
+    assert graph() is output
+    assert standin.triton_tvm_ffi_replays() == replays + 2
+    patches: int = standin.triton_tvm_ffi_patches()
+    y: torch.Tensor = torch.rand(4096)
+    patched: torch.Tensor = torch.empty_like(y)
+    assert graph(y, patched) is patched
+    assert standin.triton_tvm_ffi_patches() == patches + 1
+    assert standin.triton_tvm_ffi_patched_arg() == y.data_ptr()
+    assert standin.triton_tvm_ffi_captures() == captures + 1
+    assert standin.triton_tvm_ffi_replays() == replays + 3
+    assert standin.triton_tvm_ffi_launches() == launches
+    specialize(add, "rebuilt", ["*fp16", "*fp16", "*fp16", "i32", "constexpr"])
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert graph.stale
+    with pytest.raises(RuntimeError, match="rebuilt"):
+        graph()
+    assert graph(x, output) is output
+    assert not graph.stale
+    assert standin.triton_tvm_ffi_captures() == captures + 2
+    assert standin.triton_tvm_ffi_patches() == patches + 1
+
+
+def test_graph_patch_skips_fallback_launches(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    cpu_graph: None,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    specialize(add, "graph")
+    kernel: CompiledKernel = compile_add(
+        ["*fp64", "*fp64", "*fp64", "i32", "constexpr"]
+    )
+    calls: List[Any] = []
+
+    class Launcher(object):
+        def __getitem__(self, grid: Any) -> Callable[..., CompiledKernel]:
+            def launch(*args, **kwargs) -> CompiledKernel:
+                calls.append(args)
+                return kernel
+
+            return launch
+
+    monkeypatch.setattr(add, "fn", Launcher())
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    graph: TVMFFIGraph = TVMFFIGraph(
+        lambda x: wrapper(x, x, torch.empty_like(x), 1024), [wrapper], 0
+    )
+    graph(torch.rand(4096))
+    captures: int = standin.triton_tvm_ffi_captures()
+    patches: int = standin.triton_tvm_ffi_patches()
+    graph(torch.rand(4096, dtype=torch.float64))
+    assert len(calls) == 1
+    assert standin.triton_tvm_ffi_patches() == patches
+    assert standin.triton_tvm_ffi_captures() == captures + 1
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List
+
+import pytest
+import torch
+import triton
+from triton.compiler import CompiledKernel
+import triton.language as tl
+
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.utils import stable_hash
+
+from conftest import ADD_TYPES, add_kernel, compile_add
+
+
+def make_kernel(scale: int) -> triton.JITFunction:
+    @triton.jit
+    def scale_kernel(x_ptr, n_elements, BLOCK_SIZE: tl.constexpr):
+        offsets = tl.program_id(axis=0) * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+        mask = offsets < n_elements
+        x = tl.load(x_ptr + offsets, mask=mask)
+        tl.store(x_ptr + offsets, x * scale, mask=mask)
+
+    return scale_kernel
+
+
+def test_name_includes_source() -> None:
+    fn: TVMFFIJITFunction = TVMFFIJITFunction(add_kernel, cache=None)
+    assert fn.name == "add_kernel_" + stable_hash(
+        "conftest", "add_kernel", add_kernel.src
+    )
+
+
+def test_name_collision_raises() -> None:
+    first: triton.JITFunction = make_kernel(2)
+    fn: TVMFFIJITFunction = TVMFFIJITFunction(first, cache=None)
+    with pytest.raises(RuntimeError, match="already registered"):
+        TVMFFIJITFunction(make_kernel(3), cache=None)
+    assert TVMFFIJITFunction(first, cache=None).fullname == fn.fullname
+
+
+def test_tune_runs_config_pre_hook(monkeypatch: pytest.MonkeyPatch) -> None:
+    hooks: List[Dict[str, Any]] = []
+    warmups: List[Dict[str, Any]] = []
+    config: triton.Config = triton.Config(
+        {"BLOCK_SIZE": 1024}, num_warps=4, pre_hook=lambda nargs: hooks.append(nargs)
+    )
+    fn: TVMFFIJITFunction = TVMFFIJITFunction(
+        triton.autotune(configs=[config], key=["n_elements"])(add_kernel), cache=None
+    )
+    kernel: CompiledKernel = compile_add(ADD_TYPES)
+
+    def run(*args, grid: Any, warmup: bool, **kwargs) -> CompiledKernel:
+        warmups.append({"hooks": len(hooks), **kwargs})
+        return kernel
+
+    monkeypatch.setattr(add_kernel, "run", run)
+    x: torch.Tensor = torch.rand(4096)
+    fn.fn.cache[(4096, "torch.float32", "torch.float32", "torch.float32")] = config
+    fn.tune(kernel, (4, 1, 1), [x, x, x, 4096], {})
+    assert len(hooks) == 1
+    assert hooks[0]["x_ptr"] is x
+    assert hooks[0]["n_elements"] == 4096
+    assert hooks[0]["BLOCK_SIZE"] == 1024
+    assert warmups == [{"hooks": 1, **config.all_kwargs()}]
+    assert kernel.hash in fn.kernels
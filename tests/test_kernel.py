@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+import ctypes
+from typing import Callable, Iterator, List
+
+import pytest
+import torch
+
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import specialize
+
+
+@pytest.fixture
+def devices(standin: ctypes.CDLL) -> Iterator[Callable[[int], None]]:
+    yield standin.triton_tvm_ffi_set_devices
+    standin.triton_tvm_ffi_set_devices(1)
+    standin.triton_tvm_ffi_set_context(-1)
+
+
+def test_load_uses_the_target_device_context(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    devices: Callable[[int], None],
+) -> None:
+    devices(2)
+    specialize(add, "context")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    wrapper.compile()
+    standin.triton_tvm_ffi_set_context(1)
+    loads: int = standin.triton_tvm_ffi_device_loads(0)
+    x: torch.Tensor = torch.rand(4096)
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert standin.triton_tvm_ffi_load_device() == 0
+    assert standin.triton_tvm_ffi_device_loads(0) == loads + 1
+
+
+def test_concurrent_preload_loads_once_per_device(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    devices: Callable[[int], None],
+) -> None:
+    devices(2)
+    specialize(add, "preload")
+    specialize(add, "preload256", constants={"BLOCK_SIZE": 256})
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    wrapper.compile()
+    loads: int = standin.triton_tvm_ffi_loads()
+    per_device: List[int] = [standin.triton_tvm_ffi_device_loads(d) for d in range(2)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        [*executor.map(lambda _: wrapper.preload(), range(8))]
+    assert standin.triton_tvm_ffi_loads() == loads + 4
+    assert [standin.triton_tvm_ffi_device_loads(d) for d in range(2)] == [
+        count + 2 for count in per_device
+    ]
+    assert wrapper.registry.resident(wrapper.uniquename) > 0
@@ -0,0 +1,28 @@
+from pathlib import Path
+import subprocess
+from typing import Any, List
+
+import pytest
+
+from triton_tvm_ffi.pch import TVMFFIPrecompiledHeader
+
+
+def test_pch_failure_falls_back(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: List[Any] = []
+    run = subprocess.run
+
+    def counted(*args, **kwargs) -> subprocess.CompletedProcess:
+        calls.append(args)
+        return run(*args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "run", counted)
+    pch: TVMFFIPrecompiledHeader = TVMFFIPrecompiledHeader(
+        ["triton_tvm_ffi/missing.h"], path=tmp_path
+    )
+    with pytest.warns(RuntimeWarning, match="without the precompiled header"):
+        assert pch.cflags == []
+    with pytest.warns(RuntimeWarning, match="missing.h"):
+        assert pch.cflags == []
+    assert len(calls) == 1
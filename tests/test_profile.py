@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Union
+
+import pytest
+import torch
+
+import triton_tvm_ffi
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.profile import build_profiler
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import specialize
+
+
+@pytest.fixture
+def profiler() -> Iterator[None]:
+    build_profiler.reset()
+    triton_tvm_ffi.profile_builds()
+    yield
+    triton_tvm_ffi.profile_builds(False)
+    build_profiler.reset()
+
+
+def test_build_spans_are_recorded_and_exported(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    profiler: None,
+    tmp_path: Path,
+) -> None:
+    specialize(add, "profiled")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    x: torch.Tensor = torch.rand(4096)
+    wrapper(x, x, torch.empty_like(x), 1024)
+    stats: Dict[str, Dict[str, Union[int, float]]] = triton_tvm_ffi.build_stats()
+    for name in ("wrapper", "restore", "render", "cubins", "compile", "load"):
+        assert stats[name]["count"] >= 1
+        assert 0.0 <= stats[name]["max_ms"] <= stats[name]["total_ms"]
+    assert stats["compile"]["cubin_bytes"] == len(add.specializations[0].kernel)
+    assert stats["render"]["source_bytes"] == stats["compile"]["source_bytes"] > 0
+    path: Path = tmp_path / "trace.json"
+    triton_tvm_ffi.export_build_trace(path)
+    trace: Dict[str, Any] = json.loads(path.read_text())
+    events: List[Dict[str, Any]] = trace["traceEvents"]
+    assert trace["displayTimeUnit"] == "ms"
+    assert len(events) == sum(stat["count"] for stat in stats.values())
+    for event in events:
+        assert event["ph"] == "X"
+        assert isinstance(event["ts"], float) and event["ts"] > 0
+        assert isinstance(event["dur"], float) and event["dur"] >= 0
+        assert {"name", "cat", "pid", "tid", "args"} <= event.keys()
+    spans: Dict[str, Dict[str, Any]] = {event["name"]: event for event in events}
+    outer: Dict[str, Any] = spans["wrapper"]
+    for name in ("render", "compile", "load"):
+        assert spans[name]["args"]["wrapper"] == wrapper.name
+        assert outer["ts"] <= spans[name]["ts"]
+        assert spans[name]["ts"] + spans[name]["dur"] <= outer["ts"] + outer["dur"] + 1
+
+
+def test_disabled_profiler_records_nothing(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+) -> None:
+    build_profiler.reset()
+    specialize(add, "unprofiled")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    x: torch.Tensor = torch.rand(4096)
+    wrapper(x, x, torch.empty_like(x), 1024)
+    assert triton_tvm_ffi.build_stats() == {}
+    assert build_profiler.trace()["traceEvents"] == []
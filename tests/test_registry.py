@@ -0,0 +1,35 @@
+import ctypes
+from typing import Callable, Dict
+
+import torch
+
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.registry import TVMFFIModuleRegistry
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import specialize
+
+
+def test_registry_evicts_stale_modules(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+) -> None:
+    registry: TVMFFIModuleRegistry = TVMFFIModuleRegistry(0)
+    specialize(add, "evict")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add], registry=registry)
+    x: torch.Tensor = torch.rand(4096)
+    wrapper(x, x, torch.empty_like(x), 1024)
+    stale: str = wrapper.uniquename
+    assert registry.stats()[stale]["resident"] > 0
+    unloads: int = standin.triton_tvm_ffi_unloads()
+    specialize(add, "evict256", constants={"BLOCK_SIZE": 256})
+    wrapper(x, x, torch.empty_like(x), 256)
+    assert wrapper.uniquename != stale
+    assert standin.triton_tvm_ffi_unloads() == unloads + 1
+    stats: Dict[str, Dict[str, int]] = registry.stats()
+    assert stats[stale] == {"resident": 0, "users": 0}
+    assert stats[wrapper.uniquename]["resident"] > 0
+    assert stats[wrapper.uniquename]["users"] == 1
+    assert registry.drop() == 0
+    assert stale not in registry.stats()
@@ -0,0 +1,31 @@
+import ctypes
+from typing import Callable
+
+import torch
+
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import specialize
+
+
+def test_unload_releases_only_its_own_scratch(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+) -> None:
+    specialize(add, "scratch", global_scratch=[128, 128])
+    first: TVMFFIWrapperFunction = make_wrapper([add], "first")
+    second: TVMFFIWrapperFunction = make_wrapper([add], "second")
+    x: torch.Tensor = torch.rand(4096)
+    allocs: int = standin.triton_tvm_ffi_allocs()
+    first(x, x, torch.empty_like(x), 1024)
+    second(x, x, torch.empty_like(x), 1024)
+    assert standin.triton_tvm_ffi_allocs() == allocs + 2
+    frees: int = standin.triton_tvm_ffi_frees()
+    first.registry.unload(first.uniquename)
+    assert standin.triton_tvm_ffi_frees() == frees + 1
+    second(x, x, torch.empty_like(x), 1024)
+    assert standin.triton_tvm_ffi_allocs() == allocs + 2
+    first(x, x, torch.empty_like(x), 1024)
+    assert standin.triton_tvm_ffi_allocs() == allocs + 3
@@ -0,0 +1,30 @@
+from typing import Any, Callable, Dict
+
+import torch
+
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import specialize
+
+
+def test_telemetry_is_isolated_per_wrapper(
+    add: TVMFFIJITFunction, make_wrapper: Callable[..., TVMFFIWrapperFunction]
+) -> None:
+    specialize(add, "telemetry")
+    enabled: TVMFFIWrapperFunction = make_wrapper([add], "enabled")
+    disabled: TVMFFIWrapperFunction = make_wrapper([add], "disabled")
+    x: torch.Tensor = torch.rand(4096)
+    enabled.enable_telemetry()
+    enabled.reset_telemetry()
+    disabled.reset_telemetry()
+    for _ in range(3):
+        enabled(x, x, torch.empty_like(x), 1024)
+        disabled(x, x, torch.empty_like(x), 1024)
+    stats: Dict[str, Any] = enabled.telemetry()["add_kernel"]["specializations"][0]
+    assert stats["launches"] == 3
+    assert sum(stats["histogram"]) == 3
+    stats = disabled.telemetry()["add_kernel"]["specializations"][0]
+    assert stats["launches"] == 0
+    assert sum(stats["histogram"]) == 0
+    enabled.enable_telemetry(False)
@@ -0,0 +1,96 @@
+import ctypes
+from typing import Callable, Dict
+
+import pytest
+import torch
+import triton
+import triton.language as tl
+
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.kernel import TVMFFIKernel
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction
+
+from conftest import SM80, SM90
+from standin import StandinDriver
+
+COPY = """
+#include <cstdint>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+void Copy(tvm::ffi::Tensor x, tvm::ffi::Tensor y) {{
+  tvm::ffi::Array<tvm::ffi::Any> args = {{x, y, 16}};
+  tvm::ffi::Map<tvm::ffi::String, tvm::ffi::Any> kwargs = {{}};
+  tvm::ffi::Tuple<int32_t, int32_t, int32_t> grid(
+      static_cast<int32_t>(x.shape()[0] / 16), 1, 1);
+  COPY_KERNEL_STUB(grid, x.device().device_id, nullptr, args, kwargs);
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME, Copy);
+}}
+"""
+
+SIGNATURE: Dict[str, str] = {
+    "in_desc": "tensordesc<fp32[16, 16]>",
+    "out_desc": "tensordesc<fp32[16, 16]>",
+}
+
+
+@triton.jit
+def copy_kernel(in_desc, out_desc, BLOCK: tl.constexpr):
+    offset = tl.program_id(axis=0) * BLOCK
+    out_desc.store([offset, 0], in_desc.load([offset, 0]))
+
+
+@pytest.fixture
+def copy() -> TVMFFIJITFunction:
+    return TVMFFIJITFunction(
+        copy_kernel,
+        cache=None,
+        descriptors={
+            "in_desc": {
+                "block_shape": [16, 16],
+                "padding": "nan",
+                "round_f32_to_tf32": True,
+            },
+            "out_desc": [16, 16],
+        },
+    )
+
+
+def test_descriptor_options_reach_host_tensor_maps(
+    copy: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    target: StandinDriver,
+) -> None:
+    target.target = SM90
+    spec: TVMFFIKernel = copy.precompile(SIGNATURE, {"BLOCK": 16}, target=SM90)
+    assert spec.descriptor(0)["padding"] and spec.descriptor(0)["tf32"]
+    assert not spec.descriptor(1)["padding"] and not spec.descriptor(1)["tf32"]
+    wrapper: TVMFFIWrapperFunction = make_wrapper([copy], code=COPY)
+    x: torch.Tensor = torch.rand(64, 16)
+    wrapper(x, torch.empty_like(x))
+    assert standin.triton_tvm_ffi_tensormap_fills() == (1 << 0) | (1 << 1)
+    assert standin.triton_tvm_ffi_tensormap_types() == (1 << 7) | (1 << 11)
+
+
+def test_descriptor_options_reach_device_descriptors(
+    copy: TVMFFIJITFunction, make_wrapper: Callable[..., TVMFFIWrapperFunction]
+) -> None:
+    spec: TVMFFIKernel = copy.precompile(SIGNATURE, {"BLOCK": 16}, target=SM80)
+    assert "swizzle" not in spec.descriptor(0)
+    wrapper: TVMFFIWrapperFunction = make_wrapper([copy], code=COPY)
+    copy.restore(SM80)
+    assert "DecomposeTensorDesc<2, true, true>" in wrapper.emit
+    assert "DecomposeTensorDesc<2, false, false>" in wrapper.emit
+    x: torch.Tensor = torch.rand(64, 16)
+    wrapper(x, torch.empty_like(x))
+
+
+def test_descriptor_padding_is_validated() -> None:
+    with pytest.raises(ValueError, match="padding"):
+        TVMFFIJITFunction(
+            copy_kernel, cache=None, descriptors={"in_desc": {"padding": "inf"}}
+        )
@@ -0,0 +1,195 @@
+import ctypes
+from pathlib import Path
+import subprocess
+import sys
+import textwrap
+from typing import Any, Callable, List, Tuple
+
+import pytest
+import torch
+from torch._subclasses.fake_tensor import FakeTensorMode
+import tvm_ffi
+
+import triton_tvm_ffi
+from triton_tvm_ffi.jit import TVMFFIJITFunction
+from triton_tvm_ffi.utils import target_entry
+from triton_tvm_ffi.wrap import TVMFFIWrapperFunction, build_all
+
+from conftest import SM90, specialize
+from standin import StandinDriver
+
+SCALE = """
+#include <ATen/DLConvertor.h>
+#include <ATen/ops/mul.h>
+#include <tvm/ffi/container/tensor.h>
+#include <tvm/ffi/function.h>
+#include <tvm/ffi/tvm_ffi.h>
+
+tvm::ffi::Tensor Scale(tvm::ffi::Tensor x, double alpha, tvm::ffi::Tensor y) {{
+  at::Tensor output = at::mul(at::fromDLPack(x.ToDLPack()),
+                              at::fromDLPack(y.ToDLPack())).mul_(alpha);
+  return tvm::ffi::Tensor::FromDLPack(at::toDLPack(output));
+}}
+
+TVM_FFI_STATIC_INIT_BLOCK() {{
+  tvm::ffi::reflection::GlobalDef().def({name}_NAME, Scale);
+}}
+"""
+
+
+def test_custom_op_requires_fake() -> None:
+    with pytest.raises(TypeError, match="explicit fake"):
+        triton_tvm_ffi.torch_wrap([], "", custom_op=True)
+
+
+def test_register_op_uses_explicit_fake(
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+) -> None:
+    wrapper: TVMFFIWrapperFunction = make_wrapper([])
+
+    def project(x: torch.Tensor) -> torch.Tensor: ...
+
+    op: torch.library.CustomOpDef = wrapper.register_op(
+        project, lambda x: x.new_empty(x.shape[0], 2)
+    )
+    with FakeTensorMode():
+        assert op(torch.empty(3)).shape == (3, 2)
+
+
+def test_register_op_names_are_unique_per_wrapper(
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+) -> None:
+    wrapper: TVMFFIWrapperFunction = make_wrapper([])
+    scale: TVMFFIWrapperFunction = make_wrapper([], code=SCALE)
+    assert wrapper.name == scale.name
+    assert wrapper.opname != scale.opname
+    assert make_wrapper([]).opname == wrapper.opname
+
+    def project(x: torch.Tensor) -> torch.Tensor: ...
+
+    op: torch.library.CustomOpDef = wrapper.register_op(
+        project, lambda x: x.new_empty(x.shape[0], 2)
+    )
+    other: torch.library.CustomOpDef = scale.register_op(
+        project, lambda x: x.new_empty(x.shape[0], 3)
+    )
+    assert op._qualname == wrapper.opname
+    assert other._qualname == scale.opname
+    with FakeTensorMode():
+        assert op(torch.empty(3)).shape == (3, 2)
+        assert other(torch.empty(3)).shape == (3, 3)
+
+
+def test_batch_issues_every_launch_in_one_call(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+) -> None:
+    specialize(add, "batch")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    x: torch.Tensor = torch.rand(4096)
+    batch: List[Tuple[Any, ...]] = [(x, x, torch.empty_like(x), 1024) for _ in range(5)]
+    wrapper.compile()
+    launches: int = standin.triton_tvm_ffi_launches()
+    assert wrapper.batch(batch) == [None] * 5
+    assert standin.triton_tvm_ffi_launches() == launches + 5
+    assert standin.triton_tvm_ffi_launched() == b"batch"
+
+    def add_op(
+        x: torch.Tensor, y: torch.Tensor, output: torch.Tensor, block: int
+    ) -> None: ...
+
+    wrapper.register_op(add_op, lambda x, y, output, block: None, ["output"])
+    assert wrapper.batch(batch) == [None] * 5
+    assert standin.triton_tvm_ffi_launches() == launches + 10
+    with FakeTensorMode() as mode:
+        fake: torch.Tensor = mode.from_tensor(x)
+        wrapper.batch([(fake, fake, torch.empty_like(fake), 1024)] * 3)
+    assert standin.triton_tvm_ffi_launches() == launches + 10
+
+
+def test_build_all_for_explicit_target(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    target: StandinDriver,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    specialize(add, "sm90", target=target_entry(SM90))
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+
+    def missing() -> None:
+        raise RuntimeError("no GPU on the build box")
+
+    monkeypatch.setattr(target, "get_current_target", missing)
+    monkeypatch.setattr(wrapper, "compile", missing)
+    funcs: List[tvm_ffi.Function] = build_all([wrapper], target=SM90)
+    assert add.target == SM90
+    assert wrapper.registry.module(wrapper) == wrapper.uniquename
+    assert funcs == [tvm_ffi.get_global_func(wrapper.uniquename)]
+    x: torch.Tensor = torch.rand(4096)
+    funcs[0](x, x, torch.empty_like(x), 1024)
+    assert standin.triton_tvm_ffi_launched() == b"sm90"
+
+
+def test_exported_module_loads_without_triton(
+    add: TVMFFIJITFunction,
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+    standin: ctypes.CDLL,
+    tmp_path: Path,
+) -> None:
+    specialize(add, "exported")
+    wrapper: TVMFFIWrapperFunction = make_wrapper([add])
+    path: Path = tmp_path / "add.so"
+    uniquename: str = wrapper.export(path)
+    script: str = textwrap.dedent(f"""
+        import ctypes
+        import sys
+
+        import numpy
+        import tvm_ffi
+
+        tvm_ffi.load_module({str(path)!r})
+        standin = ctypes.CDLL({standin._name!r})
+        standin.triton_tvm_ffi_launched.restype = ctypes.c_char_p
+        x = tvm_ffi.from_dlpack(numpy.ones(4096, dtype=numpy.float32))
+        output = tvm_ffi.from_dlpack(numpy.empty(4096, dtype=numpy.float32))
+        tvm_ffi.get_global_func({uniquename!r})(x, x, output, 1024)
+        assert not any(module.startswith("triton") for module in sys.modules)
+        print(standin.triton_tvm_ffi_launches(), standin.triton_tvm_ffi_launched())
+        """)
+    result: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["1", "b'exported'"]
+
+
+def test_register_autograd_maps_grads_to_tensor_inputs(
+    make_wrapper: Callable[..., TVMFFIWrapperFunction],
+) -> None:
+    wrapper: TVMFFIWrapperFunction = make_wrapper([], code=SCALE)
+    saved: List[Any] = []
+
+    def scale(x: torch.Tensor, alpha: float, y: torch.Tensor) -> torch.Tensor: ...
+
+    def backward(
+        x: torch.Tensor, alpha: float, y: torch.Tensor, grad: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        saved.append((x, alpha, y))
+        return grad * alpha * y, grad * alpha * x
+
+    wrapper.register_op(scale, lambda x, alpha, y: torch.empty_like(x))
+    wrapper.register_autograd(backward, lambda inputs, output: inputs)
+    x: torch.Tensor = torch.rand(8, requires_grad=True)
+    y: torch.Tensor = torch.rand(8, requires_grad=True)
+    output: torch.Tensor = wrapper(x, 3.0, y)
+    torch.testing.assert_close(output, x * 3.0 * y)
+    grad: torch.Tensor = torch.rand(8)
+    dx, dy = torch.autograd.grad(output, [x, y], grad)
+    torch.testing.assert_close(dx, grad * 3.0 * y)
+    torch.testing.assert_close(dy, grad * 3.0 * x)
+    assert len(saved) == 1
+    assert saved[0][1] == 3.0
+    torch.testing.assert_close(saved[0][0], x.detach())
+    torch.testing.assert_close(saved[0][2], y.detach())